@@ -0,0 +1,188 @@
+"""
+In-process fan-out of note changes to streaming clients.
+
+Each worker runs one ``NoteChangeHub``. It follows a single MongoDB change
+stream on the ``notes`` collection and hands every changed document to the
+subscribers of its owner. The stream is resumed from its last resume token
+after errors, so a restart of the watch does not lose events. On a
+standalone MongoDB (no change streams), the hub polls ``updated_at`` instead.
+
+Deletions arrive as updates, since deleted notes are kept as tombstones.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database import get_mongo_db
+
+logger = logging.getLogger(__name__)
+
+# Server error codes: change streams need a replica set; resume point is gone
+_CHANGE_STREAMS_UNSUPPORTED = (40573,)
+_CHANGE_STREAM_HISTORY_LOST = (286, 280)
+
+_RETRY_DELAYS = (0.5, 1, 2, 5, 10)
+
+
+class Subscription:
+    """Changed note documents for one client, in arrival order."""
+
+    def __init__(self, owner_id: ObjectId, max_queue: int):
+        self.owner_id = owner_id
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_queue)
+        # Set when events were dropped (slow client, lost stream history);
+        # the client must reconnect and catch up from its last sync token
+        self.overflowed = asyncio.Event()
+
+    def push(self, doc: dict) -> None:
+        if self.overflowed.is_set():
+            return
+        try:
+            self.queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            self.overflowed.set()
+
+    def close(self) -> None:
+        """End the client's stream; it reconnects and catches up."""
+        self.overflowed.set()
+        try:
+            # Wake up a reader waiting on an empty queue
+            self.queue.put_nowait({})
+        except asyncio.QueueFull:
+            pass
+
+
+class NoteChangeHub:
+    def __init__(self, mode: str = "auto", poll_interval: float = 1.0, max_queue: int = 1000):
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.max_queue = max_queue
+        self.source: Optional[str] = None  # "changestream" or "poll" once running
+        self.resume_token: Optional[dict] = None
+        self._subscribers: Dict[ObjectId, Set[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, owner_id: ObjectId) -> Subscription:
+        subscription = Subscription(owner_id, self.max_queue)
+        self._subscribers.setdefault(owner_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.owner_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.owner_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, doc: dict) -> None:
+        """Hand a changed note document to everyone subscribed to its owner."""
+        for subscription in list(self._subscribers.get(doc.get("owner_id"), ())):
+            subscription.push(doc)
+
+    def _reset_all(self) -> None:
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.close()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._reset_all()
+
+    async def _run(self) -> None:
+        if self.mode != "poll":
+            try:
+                await self._watch()
+                return
+            except OperationFailure as e:
+                if self.mode == "changestream" or e.code not in _CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                logger.info("MongoDB change streams unavailable, polling notes for changes")
+        await self._poll()
+
+    async def _watch(self) -> None:
+        collection = get_mongo_db()["notes"]
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        attempt = 0
+        while True:
+            try:
+                async with collection.watch(
+                    pipeline, full_document="updateLookup", resume_after=self.resume_token
+                ) as stream:
+                    self.source = "changestream"
+                    attempt = 0
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        doc = change.get("fullDocument")
+                        if doc is not None:
+                            self.publish(doc)
+            except OperationFailure as e:
+                if e.code in _CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                if e.code in _CHANGE_STREAM_HISTORY_LOST:
+                    # Events between the token and now are gone; make clients catch up
+                    logger.warning("Note change stream history lost, resetting subscribers")
+                    self.resume_token = None
+                    self._reset_all()
+                    continue
+                logger.warning(f"Note change stream failed, resuming: {e}")
+            except PyMongoError as e:
+                logger.warning(f"Note change stream failed, resuming: {e}")
+            await asyncio.sleep(_RETRY_DELAYS[min(attempt, len(_RETRY_DELAYS) - 1)])
+            attempt += 1
+
+    async def _poll(self) -> None:
+        """Fallback for standalone MongoDB: query recent changes of subscribed owners."""
+        self.source = "poll"
+        collection = get_mongo_db()["notes"]
+        lookback = timedelta(seconds=settings.NOTES_SYNC_LOOKBACK_SECONDS)
+        since = datetime.utcnow() - lookback
+        # (id, updated_at) already published within the lookback window
+        seen: Dict[tuple, datetime] = {}
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            owners: List[ObjectId] = list(self._subscribers)
+            now = datetime.utcnow()
+            if not owners:
+                since, seen = now - lookback, {}
+                continue
+            try:
+                cursor = collection.find(
+                    {"owner_id": {"$in": owners}, "updated_at": {"$gte": since}}
+                ).sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+                async for doc in cursor:
+                    key = (doc["_id"], doc["updated_at"])
+                    if key not in seen:
+                        seen[key] = doc["updated_at"]
+                        self.publish(doc)
+            except PyMongoError as e:
+                logger.warning(f"Polling notes for changes failed: {e}")
+                continue
+            # Re-read the lookback window each time for late commits
+            since = now - lookback
+            seen = {key: updated_at for key, updated_at in seen.items() if updated_at >= since}
+
+
+note_changes = NoteChangeHub(
+    mode=settings.NOTES_STREAM_MODE,
+    poll_interval=settings.NOTES_STREAM_POLL_INTERVAL_SECONDS,
+    max_queue=settings.NOTES_STREAM_QUEUE_SIZE,
+)
@@ -0,0 +1,85 @@
+"""
+Helpers for HTTP conditional requests (RFC 9110, section 13).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+
+
+def parse_etags(header: str) -> List[str]:
+    """Entity tags of an If-Match / If-None-Match header, ``["*"]`` for a wildcard."""
+    header = header.strip()
+    if header == "*":
+        return ["*"]
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+# Content codings the compression middleware names in the ETags it changes
+CONTENT_CODINGS = ("gzip", "br", "zstd")
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """
+    ETag of the ``coding``-compressed representation: ``"x"`` -> ``"x-gzip"``.
+
+    A strong ETag identifies one sequence of bytes, so the compressed body
+    needs its own (RFC 9110, 8.8.3).
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def strip_coding(tag: str) -> str:
+    """``tag`` without a suffix added by ``encoded_etag``, i.e. the tag the route computed."""
+    for coding in CONTENT_CODINGS:
+        suffix = f'-{coding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def _weak_opaque(tag: str) -> str:
+    return strip_coding(tag[2:] if tag.startswith("W/") else tag)
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """
+    False if If-None-Match matches ``etag`` (weak comparison), i.e. 304
+    applies. Tags of compressed representations match their route's tag.
+    """
+    if header is None:
+        return True
+    opaque = _weak_opaque(etag)
+    for tag in parse_etags(header):
+        if tag == "*" or _weak_opaque(tag) == opaque:
+            return False
+    return True
+
+
+def http_date(value: datetime) -> str:
+    """A naive UTC datetime as an HTTP date (Last-Modified)."""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def modified_since(header: Optional[str], last_modified: datetime) -> bool:
+    """False if the resource is unchanged since If-Modified-Since (second precision)."""
+    if header is None:
+        return True
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        return True
+    return last_modified.replace(microsecond=0, tzinfo=timezone.utc) > since
+
+
+def not_modified(if_none_match: Optional[str], if_modified_since: Optional[str],
+                 etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Whether a GET can be answered with 304. If-Modified-Since only counts without If-None-Match."""
+    if if_none_match is not None:
+        return not none_match(if_none_match, etag)
+    if last_modified is not None:
+        return not modified_since(if_modified_since, last_modified)
+    return False
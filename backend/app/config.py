@@ -16,15 +16,32 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
     
+    # Authenticated user cache (per process; other workers see changes after the TTL)
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    # How long a revoked token may still be accepted by other workers
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "30"))
+    
     # Password settings
     PASSWORD_MIN_LENGTH: int = 12
     PASSWORD_REQUIRE_UPPERCASE: bool = True
     PASSWORD_REQUIRE_LOWERCASE: bool = True
     PASSWORD_REQUIRE_DIGITS: bool = True
     PASSWORD_REQUIRE_SPECIAL: bool = True
-    
+
+    # Password hashing executor (bcrypt runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64"))
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER_SECONDS", "1"))
+
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "100"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # Hard cap on tracked clients
+    # memory: per process, shared: all workers on one host, mongo: all replicas
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SHARED_PATH: str = os.getenv("RATE_LIMIT_SHARED_PATH", "/dev/shm/noteapp-ratelimit")
+    RATE_LIMIT_SHARED_SLOTS: int = int(os.getenv("RATE_LIMIT_SHARED_SLOTS", "65536"))
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL_SECONDS", "1.0"))
     
     # CORS settings - Default to empty list, must be set in environment
     BACKEND_CORS_ORIGINS: List[str] = []
@@ -43,6 +60,34 @@ class Settings(BaseSettings):
     MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
     MONGODB_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "10000"))
     MONGODB_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "2000"))
+    MONGODB_POOL_WARMUP: bool = os.getenv("MONGODB_POOL_WARMUP", "False").lower() == "true"  # Pre-open minPoolSize connections at startup
+    MONGODB_POOL_WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("MONGODB_POOL_WARMUP_TIMEOUT_SECONDS", "10"))  # Longest startup wait for the pool to reach minPoolSize
+    
+    # Notes bulk endpoints
+    NOTES_PREVIEW_CHARS: int = int(os.getenv("NOTES_PREVIEW_CHARS", "200"))  # Length of `preview` in note list summaries
+    NOTES_EXPORT_BATCH_SIZE: int = int(os.getenv("NOTES_EXPORT_BATCH_SIZE", "1000"))  # Cursor batch size for /api/notes/export
+    NOTES_IMPORT_BATCH_SIZE: int = int(os.getenv("NOTES_IMPORT_BATCH_SIZE", "500"))  # Documents per insert_many in /api/notes/import
+    NOTES_IMPORT_MAX_LINE_BYTES: int = int(os.getenv("NOTES_IMPORT_MAX_LINE_BYTES", "1048576"))
+    NOTES_IMPORT_MAX_ERRORS: int = int(os.getenv("NOTES_IMPORT_MAX_ERRORS", "1000"))  # Error details returned per import
+    NOTES_SYNC_LOOKBACK_SECONDS: float = float(os.getenv("NOTES_SYNC_LOOKBACK_SECONDS", "5"))  # Covers write commit latency and clock skew between servers
+    NOTES_TOMBSTONE_TTL_SECONDS: int = int(os.getenv("NOTES_TOMBSTONE_TTL_SECONDS", str(30 * 24 * 3600)))  # Sync tokens older than this get 410
+    NOTES_STREAM_MODE: str = os.getenv("NOTES_STREAM_MODE", "auto")  # auto: change stream, polling on standalone; changestream; poll
+    NOTES_STREAM_POLL_INTERVAL_SECONDS: float = float(os.getenv("NOTES_STREAM_POLL_INTERVAL_SECONDS", "1.0"))
+    NOTES_STREAM_QUEUE_SIZE: int = int(os.getenv("NOTES_STREAM_QUEUE_SIZE", "1000"))  # Per client; a client that falls further behind is disconnected
+    NOTES_BATCH_MAX_OPERATIONS: int = int(os.getenv("NOTES_BATCH_MAX_OPERATIONS", "500"))  # Operations per /api/notes/batch request
+    NOTES_SEARCH_MAX_TIME_MS: int = int(os.getenv("NOTES_SEARCH_MAX_TIME_MS", "2000"))  # Server-side limit per /api/notes/search query
+    
+    # Response compression (gzip; brotli and zstd when their packages are installed)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Smaller complete bodies are sent as is
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+    
+    # Metrics (/metrics). Set METRICS_MULTIPROC_DIR to aggregate across uvicorn workers
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_MULTIPROC_DIR: Optional[str] = os.getenv("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", "5"))
     
     # Session settings
     SESSION_SECRET_KEY: str = os.getenv("SESSION_SECRET_KEY", secrets.token_urlsafe(32))
@@ -52,6 +97,10 @@ class Settings(BaseSettings):
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records beyond this are dropped and counted
+    LOG_REQUEST_SAMPLE_RATE: float = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "0.1"))  # Fraction of successful requests logged
+    LOG_SLOW_REQUEST_SECONDS: float = float(os.getenv("LOG_SLOW_REQUEST_SECONDS", "1.0"))  # Slower requests are always logged
+    LOG_REPEAT_WINDOW_SECONDS: float = float(os.getenv("LOG_REPEAT_WINDOW_SECONDS", "60"))  # 0 disables collapsing repeated warnings
     
     # SSL/TLS settings
     SSL_KEYFILE: Optional[str] = os.getenv("SSL_KEYFILE")
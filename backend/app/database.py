@@ -1,12 +1,104 @@
 """
 Database configuration for MongoDB using Motor.
 """
+import asyncio
 import logging
+import threading
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
 from app.config import settings
+from app.metrics import mongodb_command_duration_seconds, mongodb_pool_checkout_wait_seconds
 
 logger = logging.getLogger(__name__)
 
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks connection pool usage from driver events.
+    Events are delivered on driver threads, so counters are guarded by a lock.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_seconds_total": self.checkout_wait_seconds_total,
+                "checkout_wait_seconds_max": self.checkout_wait_seconds_max,
+            }
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+            self.connections_closed += 1
+
+    def connection_checked_out(self, event):
+        wait = getattr(event, "duration", 0.0) or 0.0
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.checkout_wait_seconds_total += wait
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, wait)
+        mongodb_pool_checkout_wait_seconds.observe((), wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Feeds MongoDB command latencies into the metrics registry."""
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongodb_command_duration_seconds.observe((event.command_name, "ok"), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongodb_command_duration_seconds.observe((event.command_name, "error"), event.duration_micros / 1e6)
+
+pool_metrics = PoolMetricsListener()
+command_metrics = CommandMetricsListener()
+
 class DataBase:
     client: AsyncIOMotorClient | None = None
     db: AsyncIOMotorDatabase | None = None
@@ -19,15 +111,56 @@ async def connect_to_mongo():
     """
     logger.info("Connecting to MongoDB...")
     try:
-        db.client = AsyncIOMotorClient(settings.MONGODB_URI)
+        db.client = AsyncIOMotorClient(
+            settings.MONGODB_URI,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+            event_listeners=[pool_metrics, command_metrics],
+        )
         db.db = db.client[settings.MONGODB_DB_NAME]
         # Ping the server to verify connection
         await db.client.admin.command('ping')
         logger.info(f"Successfully connected to MongoDB database: {settings.MONGODB_DB_NAME}")
+        
+        if settings.MONGODB_POOL_WARMUP:
+            await warm_up_pool()
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
+async def warm_up_pool():
+    """
+    Open minPoolSize connections before the app reports ready.
+    Concurrent pings make the driver start connecting now. It only opens a
+    couple of connections at a time (maxConnecting) and hands idle ones to
+    later pings, so the rest come from its background minPoolSize
+    maintenance: wait for the open count to catch up, up to a timeout.
+    """
+    count = settings.MONGODB_MIN_POOL_SIZE
+    if count <= 0:
+        return
+    timeout = settings.MONGODB_POOL_WARMUP_TIMEOUT_SECONDS
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    await asyncio.gather(*(db.client.admin.command('ping') for _ in range(count)))
+    while pool_metrics.open_connections < count and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+
+    opened = pool_metrics.open_connections
+    if opened < count:
+        logger.warning(
+            f"MongoDB pool warm-up timed out after {timeout}s: "
+            f"{opened} of {count} connections open ({count - opened} short)"
+        )
+    else:
+        logger.info(f"MongoDB pool warmed up: {opened} connections open")
+
+def get_pool_stats() -> dict:
+    """Connection pool metrics for monitoring."""
+    return pool_metrics.stats()
+
 async def close_mongo_connection():
     """
     Closes the MongoDB database connection.
@@ -1,19 +1,59 @@
 import logging
+import queue
+import random
+import re
 import sys
 import os
+import threading
+import time
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Dict, List, Optional, Tuple
 from pythonjsonlogger import jsonlogger
 from app.config import settings
 
+SENSITIVE_FIELDS = ('password', 'token', 'secret', 'key', 'auth')
+
+# One pass for every field: "<field>=value" or "<field>: value"
+_SENSITIVE_VALUE = re.compile(
+    r'(' + '|'.join(SENSITIVE_FIELDS) + r')[=:]\s*\S+',
+    flags=re.IGNORECASE,
+)
+
+def _mask_match(match: re.Match) -> str:
+    return f'{match.group(1).lower()}=*****'
+
+# Same match on already lower-cased text; much cheaper than the IGNORECASE scan
+_SENSITIVE_LOWER = re.compile(r'(?:' + '|'.join(SENSITIVE_FIELDS) + r')[=:]')
+
+def _mentions_sensitive_field(lowered: str) -> bool:
+    """Plain substring checks on lower-cased text (keep in sync with SENSITIVE_FIELDS)"""
+    return 'password' in lowered or 'token' in lowered or 'secret' in lowered or 'key' in lowered or 'auth' in lowered
+
+def _may_contain_secret(text: str) -> bool:
+    """Cheap pre-check; only texts that pass it are run through the masking regex"""
+    lowered = text.lower()
+    return _mentions_sensitive_field(lowered) and _SENSITIVE_LOWER.search(lowered) is not None
+
 class SecurityJsonFormatter(jsonlogger.JsonFormatter):
     """Custom JSON formatter with security-related fields"""
+    def __init__(self, *args, mask_sensitive: Optional[bool] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Masking is on in production unless explicitly set
+        self.mask_sensitive = settings.is_production() if mask_sensitive is None else mask_sensitive
+        self._sensitive_keys: dict = {}
+
     def add_fields(self, log_record, record, message_dict):
         super().add_fields(log_record, record, message_dict)
         
-        # Add ISO timestamp
-        log_record['timestamp'] = datetime.utcnow().isoformat()
+        # Mask sensitive data in the message and in structured extra fields
+        if self.mask_sensitive:
+            self.mask_record(log_record)
+        
+        # Add ISO timestamp (of the event, not of the deferred formatting)
+        log_record['timestamp'] = datetime.utcfromtimestamp(record.created).isoformat()
         
         # Add environment info
         log_record['environment'] = settings.ENVIRONMENT
@@ -24,32 +64,209 @@ class SecurityJsonFormatter(jsonlogger.JsonFormatter):
             log_record['process'] = record.process
             log_record['thread'] = record.thread
             log_record['threadName'] = record.threadName
-        
-        # Mask sensitive data in production
-        if settings.is_production() and 'password' in str(message_dict):
-            log_record['message'] = self.mask_sensitive_data(log_record['message'])
-    
+
+    def mask_record(self, log_record: dict) -> None:
+        """Mask sensitive values in place: whole values of sensitive keys, inline secrets in strings"""
+        message = log_record.get('message')
+        if isinstance(message, str) and _may_contain_secret(message):
+            log_record['message'] = _SENSITIVE_VALUE.sub(_mask_match, message)
+
+        # The format fields come first; anything after them is extra or dict fields
+        first_extra = len(self._required_fields)
+        if len(log_record) <= first_extra:
+            return
+        for key, value in islice(log_record.items(), first_extra, None):
+            sensitive_key = self._sensitive_keys.get(key)
+            if sensitive_key is None:
+                sensitive_key = self._sensitive_keys[key] = _mentions_sensitive_field(key.lower())
+            if sensitive_key:
+                if value is not None:
+                    log_record[key] = '*****'
+            elif isinstance(value, str) and _may_contain_secret(value):
+                log_record[key] = _SENSITIVE_VALUE.sub(_mask_match, value)
+
     @staticmethod
     def mask_sensitive_data(message: str) -> str:
         """Mask sensitive data in log messages"""
-        sensitive_fields = ['password', 'token', 'secret', 'key', 'auth']
-        masked_message = message
-        
-        for field in sensitive_fields:
-            # Match field followed by any non-whitespace characters
-            import re
-            pattern = fr'{field}[=:]\s*\S+'
-            masked_message = re.sub(
-                pattern,
-                f'{field}=*****',
-                masked_message,
-                flags=re.IGNORECASE
-            )
-        
-        return masked_message
+        if not _may_contain_secret(message):
+            return message
+        return _SENSITIVE_VALUE.sub(_mask_match, message)
+
+class DropCountingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without blocking.
+
+    Formatting is left to the listener thread, so the caller only pays for
+    the enqueue. When the queue is full the record is dropped and counted.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze the message (args may change later) but leave JSON
+        # formatting and exc_info rendering to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class FlushingQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue."""
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+class SamplingFilter(logging.Filter):
+    """
+    Passes every record at ``always_level`` or above and a random
+    ``rate`` fraction of the rest.
+    """
+    def __init__(self, rate: float, always_level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.always_level = always_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.always_level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+class RepeatedMessageFilter(logging.Filter):
+    """
+    Collapses floods of the same warning into periodic summaries.
+
+    Records are identical when they share logger, level, message template
+    and arguments, so failed logins for different users stay separate
+    records while a flood for one user is collapsed. The first record passes;
+    repeats within ``window`` seconds are counted and dropped, and a summary
+    with the count is logged once the window has passed. Summaries go
+    straight to ``emit`` (normally the handler's ``emit``, bypassing
+    filters); expired windows are checked lazily, at most once per
+    ``window``. At most ``max_keys`` messages are tracked at a time; past
+    that, new ones pass unfiltered.
+
+    Records from the ``excluded`` loggers (and their children) always pass:
+    the request log keeps its details in ``extra``, so every slow request
+    would look like a repeat of the first.
+    """
+    def __init__(self, window: float, levels: Tuple[int, ...] = (logging.WARNING,),
+                 emit: Optional[Callable[[logging.LogRecord], object]] = None,
+                 max_keys: int = 10_000, excluded: Tuple[str, ...] = ()):
+        super().__init__()
+        self.window = window
+        self.levels = frozenset(levels)
+        self.excluded = tuple(excluded)
+        self.emit = emit
+        self.max_keys = max_keys
+        self.suppressed_total = 0
+        # key -> [window start, suppressed count, last suppressed record]
+        self._seen: Dict[tuple, list] = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.window <= 0:
+            return True
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            with self._lock:
+                self._next_sweep = now + self.window
+                summaries = self._expire(now)
+            for summary in summaries:
+                self._emit(summary)
+        if record.levelno not in self.levels or self._is_excluded(record.name):
+            return True
+
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else repr(record.msg),
+               repr(record.args))
+        summary = None
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                entry[2] = record
+                self.suppressed_total += 1
+                return False
+            if entry is not None and entry[1]:
+                summary = self._summary(entry)
+            if entry is not None or len(self._seen) < self.max_keys:
+                self._seen[key] = [now, 0, None]
+        if summary is not None:
+            self._emit(summary)
+        return True
+
+    def _is_excluded(self, name: str) -> bool:
+        return any(name == excluded or name.startswith(excluded + ".") for excluded in self.excluded)
+
+    def flush(self) -> None:
+        """Log summaries for every message that still has suppressed repeats."""
+        with self._lock:
+            summaries = self._expire(float("inf"))
+        for summary in summaries:
+            self._emit(summary)
+
+    def _expire(self, now: float) -> List[logging.LogRecord]:
+        summaries = []
+        for key, entry in list(self._seen.items()):
+            if now - entry[0] >= self.window:
+                del self._seen[key]
+                if entry[1]:
+                    summaries.append(self._summary(entry))
+        return summaries
+
+    def _summary(self, entry: list) -> logging.LogRecord:
+        record = entry[2]
+        return logging.LogRecord(
+            record.name, record.levelno, record.pathname, record.lineno,
+            "Suppressed %d repeats of %r within %ss (last: %s)",
+            (entry[1], record.msg, self.window, record.getMessage()),
+            None, func=record.funcName,
+        )
+
+    def _emit(self, record: logging.LogRecord) -> None:
+        if self.emit is not None:
+            self.emit(record)
+
+_queue_handler: Optional[DropCountingQueueHandler] = None
+_listener: Optional[FlushingQueueListener] = None
+_repeat_filter: Optional[RepeatedMessageFilter] = None
+
+def dropped_log_records() -> int:
+    """Records discarded because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+def shutdown_logging() -> None:
+    """Write out every queued record and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    if _repeat_filter is not None:
+        _repeat_filter.flush()
+    _listener.stop()
+    # Anything logged after this point is written synchronously
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _queue_handler.removeFilter(_repeat_filter)
+    for handler in _listener.handlers:
+        handler.flush()
+        root.addHandler(handler)
+    _listener = None
 
 def setup_logging():
-    """Configure secure logging with both file and console output"""
+    """
+    Configure secure logging with both file and console output.
+
+    Loggers only enqueue records; a listener thread formats them and does
+    the console and file I/O, so logging never blocks the event loop.
+    """
+    global _queue_handler, _listener, _repeat_filter
+    shutdown_logging()
+
     # Set base log level
     log_level = logging.DEBUG if settings.DEBUG else logging.INFO
     logger = logging.getLogger()
@@ -59,6 +276,9 @@ def setup_logging():
     if logger.hasHandlers():
         logger.handlers.clear()
 
+    # Handlers run on the listener thread, behind the queue
+    handlers = []
+
     # Create formatters
     json_formatter = SecurityJsonFormatter(
         fmt="%(timestamp)s %(levelname)s %(name)s %(funcName)s %(filename)s %(lineno)d %(message)s",
@@ -68,7 +288,7 @@ def setup_logging():
     # Console handler (stdout)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(json_formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # File handler with rotation
     if settings.is_production():
@@ -88,14 +308,13 @@ def setup_logging():
             encoding='utf-8'
         )
         file_handler.setFormatter(json_formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
         
         # Secure log file permissions
         if os.name != 'nt':  # Not Windows
             os.chmod(app_log_file, 0o640)
         
-        # Security audit log
-        audit_logger = logging.getLogger('security_audit')
+        # Security audit log (audit records still propagate to the app log too)
         audit_log_file = log_dir / "security_audit.log"
         audit_handler = RotatingFileHandler(
             audit_log_file,
@@ -104,12 +323,30 @@ def setup_logging():
             encoding='utf-8'
         )
         audit_handler.setFormatter(json_formatter)
-        audit_logger.addHandler(audit_handler)
+        audit_handler.addFilter(logging.Filter('security_audit'))
+        handlers.append(audit_handler)
         
         # Secure audit log file permissions
         if os.name != 'nt':  # Not Windows
             os.chmod(audit_log_file, 0o640)
 
+    # Bounded queue between the loggers and the handlers
+    _queue_handler = DropCountingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    logger.addHandler(_queue_handler)
+
+    # Collapse floods of identical warnings (e.g. failed logins for one user) into summaries.
+    # Request logs are left out: slow requests are always kept (see below)
+    _repeat_filter = RepeatedMessageFilter(settings.LOG_REPEAT_WINDOW_SECONDS, emit=_queue_handler.emit,
+                                           excluded=("api",))
+    _queue_handler.addFilter(_repeat_filter)
+
+    # Request logs: errors and slow requests always, successful ones sampled
+    request_logger = logging.getLogger("api")
+    request_logger.filters = [f for f in request_logger.filters if not isinstance(f, SamplingFilter)]
+    request_logger.addFilter(SamplingFilter(settings.LOG_REQUEST_SAMPLE_RATE))
+    _listener = FlushingQueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
     # Configure uvicorn loggers
     for logger_name in ["uvicorn.access", "uvicorn.error"]:
         uvicorn_logger = logging.getLogger(logger_name)
@@ -1,15 +1,32 @@
-from fastapi import FastAPI, Request
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 import logging # Import logging
-from pymongo import ASCENDING, IndexModel # Import for index creation
+from pymongo import ASCENDING, DESCENDING, IndexModel # Import for index creation
 import time
 
 from .config import settings
 from .routes import auth, users, notes  # Import new routers
-from .database import connect_to_mongo, close_mongo_connection, get_mongo_db # Import MongoDB functions
-from .logging_config import setup_logging
+from .changefeed import note_changes
+from .database import connect_to_mongo, close_mongo_connection, get_mongo_db, get_pool_stats # Import MongoDB functions
+from .logging_config import dropped_log_records, setup_logging, shutdown_logging
 from .middleware.security import setup_security_middleware
+from .security import shutdown_password_executor, user_cache, password_executor
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    collect_all,
+    gauge_snapshot,
+    registry,
+    render,
+    start_metrics_flusher,
+    stop_metrics_flusher,
+)
+from .middleware.compression import CompressionMiddleware
+from .middleware.logging import RequestLoggingMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.timing import ProcessTimeMiddleware
+from .titles import backfill_title_norm_once
 
 # Setup logging before creating the app instance
 setup_logging()
@@ -46,13 +63,47 @@ app.add_middleware(
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+app.add_middleware(ProcessTimeMiddleware)
+
+# One sampled record per request, on the "api" logger (see logging_config)
+app.add_middleware(RequestLoggingMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Request metrics; added last so it is the outermost middleware and times the whole stack
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+def _collect_runtime_metrics() -> dict:
+    """Scrape-time values from caches, the MongoDB pool and the hashing pool."""
+    cache = user_cache.stats()
+    pool = get_pool_stats()
+    return {
+        "user_cache_hits_total": gauge_snapshot("Authenticated user cache hits", {(): cache["hits"]}, type="counter"),
+        "user_cache_misses_total": gauge_snapshot("Authenticated user cache misses", {(): cache["misses"]}, type="counter"),
+        "user_cache_evictions_total": gauge_snapshot("Authenticated user cache evictions", {(): cache["evictions"]}, type="counter"),
+        "user_cache_size": gauge_snapshot("Authenticated user cache entries", {(): cache["size"]}),
+        "mongodb_pool_connections_open": gauge_snapshot("Open MongoDB connections", {(): pool["open_connections"]}),
+        "mongodb_pool_connections_checked_out": gauge_snapshot("MongoDB connections in use", {(): pool["checked_out"]}),
+        "mongodb_pool_connections_created_total": gauge_snapshot("MongoDB connections created", {(): pool["connections_created"]}, type="counter"),
+        "mongodb_pool_connections_closed_total": gauge_snapshot("MongoDB connections closed", {(): pool["connections_closed"]}, type="counter"),
+        "mongodb_pool_checkout_failures_total": gauge_snapshot("Failed MongoDB connection checkouts", {(): pool["checkout_failures"]}, type="counter"),
+        "password_hash_pending": gauge_snapshot("Password hashes queued or running", {(): password_executor.pending}),
+        "password_hash_rejected_total": gauge_snapshot("Password hash requests rejected with 503", {(): password_executor.rejected}, type="counter"),
+        "notes_stream_subscribers": gauge_snapshot("Clients connected to /api/notes/stream", {(): note_changes.subscriber_count()}),
+        "log_records_dropped_total": gauge_snapshot("Log records dropped because the log queue was full", {(): dropped_log_records()}, type="counter"),
+    }
+
+registry.register_collector(_collect_runtime_metrics)
+
+async def _backfill_title_norm():
+    try:
+        # Every worker starts this; only the one that claims it does the work
+        await backfill_title_norm_once(get_mongo_db())
+    except Exception as e:
+        # Notes without title_norm are only missing from /suggest; retried once the claim expires
+        logger.warning(f"title_norm backfill failed: {e}")
 
 @app.on_event("startup")
 async def startup_event():
@@ -67,6 +118,7 @@ async def startup_event():
             raise ValueError("SSL certificates must be configured in production")
     
     await connect_to_mongo()
+    await app.state.rate_limiter.start()
     
     try:
         db = get_mongo_db()
@@ -85,10 +137,17 @@ async def startup_event():
         note_collection = db["notes"]
         await note_collection.create_indexes([
             IndexModel([("owner_id", ASCENDING)]),
+            # Keyset pagination of note lists (see routes/notes.get_notes)
+            IndexModel([("owner_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)]),
             IndexModel([("created_at", ASCENDING)]),
             IndexModel([("updated_at", ASCENDING)]),
+            # Title autocomplete (see routes/notes.suggest_notes)
+            IndexModel([("owner_id", ASCENDING), ("title_norm", ASCENDING)]),
+            # Full-text search (see routes/notes.search_notes)
             IndexModel([("title", "text"), ("content", "text")]),
-            IndexModel([("is_public", ASCENDING)])
+            IndexModel([("is_public", ASCENDING)]),
+            # Tombstones of deleted notes (see routes/notes.get_changes)
+            IndexModel([("deleted_at", ASCENDING)], expireAfterSeconds=settings.NOTES_TOMBSTONE_TTL_SECONDS)
         ])
         logger.info("Indexes created successfully for 'notes' collection")
         
@@ -104,14 +163,25 @@ async def startup_event():
         logger.exception(f"Error creating indexes: {e}")
         raise
 
+    # Runs in the background so a large backfill does not hold up startup
+    app.state.title_backfill = asyncio.create_task(_backfill_title_norm())
+    await note_changes.start()
+    start_metrics_flusher()
     logger.info("Application startup events completed")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close MongoDB connection on shutdown"""
     logger.info("Starting application shutdown events...")
+    if getattr(app.state, "title_backfill", None) is not None:
+        app.state.title_backfill.cancel()
+    await note_changes.stop()
+    await app.state.rate_limiter.close()
+    await stop_metrics_flusher()
     await close_mongo_connection()
+    shutdown_password_executor()
     logger.info("Application shutdown events completed")
+    shutdown_logging()
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -125,5 +195,13 @@ async def health_check():
         "status": "healthy",
         "version": settings.VERSION,
         "environment": settings.ENVIRONMENT,
-        "timestamp": time.time()
-    }
\ No newline at end of file
+        "timestamp": time.time(),
+        "user_cache": user_cache.stats(),
+        "mongodb_pool": get_pool_stats()
+    }
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics endpoint"""
+        return Response(content=render(collect_all()), media_type=METRICS_CONTENT_TYPE)
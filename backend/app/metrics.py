@@ -0,0 +1,341 @@
+"""
+Lightweight Prometheus metrics.
+
+Metric values are kept in per-thread shards: the thread that records a value
+is the only one that writes to its shard, so the hot path is a dict update
+with no lock. A scrape merges all shards. Request metrics are recorded on the
+event loop thread; MongoDB driver events arrive on driver threads and get
+their own shards.
+
+With ``METRICS_MULTIPROC_DIR`` set, every worker periodically writes a
+snapshot of its metrics to that directory and ``/metrics`` merges the
+snapshots of all workers. Counters and histograms are summed across every
+snapshot; gauges only across workers that are still alive. Empty the
+directory when the deployment starts.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        registry.register(self)
+
+    def _shard(self) -> dict:
+        # Only taken the first time a thread records this metric
+        values: dict = {}
+        with self._shards_lock:
+            self._shards.append(values)
+        self._local.values = values
+        return values
+
+    def _merged(self) -> dict:
+        raise NotImplementedError
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [[list(labels), value] for labels, value in self._merged().items()],
+        }
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), value: float = 1) -> None:
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._shard()
+        values[labels] = values.get(labels, 0) + value
+
+    def _merged(self) -> dict:
+        merged: dict = {}
+        for shard in list(self._shards):
+            for labels, value in shard.copy().items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+
+class Gauge(Counter):
+    """Up/down value; shards hold deltas that are summed on scrape."""
+    type = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), value: float = 1) -> None:
+        self.inc(labels, -value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._shard()
+        state = values.get(labels)
+        if state is None:
+            # Per-bucket (non-cumulative) counts, +Inf bucket, then the sum
+            state = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merged(self) -> dict:
+        merged: dict = {}
+        for shard in list(self._shards):
+            for labels, state in shard.copy().items():
+                state = list(state)
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = state
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return merged
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+# A collector returns {name: snapshot} for values computed at scrape time
+Collector = Callable[[], Dict[str, dict]]
+
+
+def gauge_snapshot(documentation: str, samples: Dict[Tuple[str, ...], float],
+                   labelnames: Tuple[str, ...] = (), type: str = "gauge") -> dict:
+    """Build a snapshot entry for a collector."""
+    return {
+        "type": type,
+        "help": documentation,
+        "labelnames": list(labelnames),
+        "samples": [[list(labels), value] for labels, value in samples.items()],
+    }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, dict]:
+        snapshot = {metric.name: metric.snapshot() for metric in self._metrics}
+        for collector in self._collectors:
+            try:
+                snapshot.update(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return snapshot
+
+
+registry = MetricsRegistry()
+
+
+# --- Multi-worker aggregation -------------------------------------------------
+
+def _snapshot_path(directory: str, pid: int) -> Path:
+    return Path(directory) / f"metrics-{pid}.json"
+
+
+def write_snapshot(directory: str) -> None:
+    """Atomically write this worker's metrics to ``directory``."""
+    path = _snapshot_path(directory, os.getpid())
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"pid": os.getpid(), "metrics": registry.snapshot()}))
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge_into(merged: Dict[str, dict], snapshot: Dict[str, dict], include_gauges: bool) -> None:
+    for name, metric in snapshot.items():
+        if metric["type"] == "gauge" and not include_gauges:
+            continue
+        target = merged.setdefault(name, {**metric, "samples": {}})
+        samples = target["samples"]
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            if key not in samples:
+                samples[key] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                total = samples[key]
+                for i, v in enumerate(value):
+                    total[i] += v
+            else:
+                samples[key] += value
+
+
+def collect_all() -> Dict[str, dict]:
+    """Metrics of this worker, merged with other workers' snapshots if configured."""
+    directory = settings.METRICS_MULTIPROC_DIR
+    merged: Dict[str, dict] = {}
+    if not directory:
+        _merge_into(merged, registry.snapshot(), include_gauges=True)
+        return merged
+
+    write_snapshot(directory)
+    for path in Path(directory).glob("metrics-*.json"):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        _merge_into(merged, data["metrics"], include_gauges=_pid_alive(data["pid"]))
+    return merged
+
+
+# --- Exposition ---------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: List[str], values: Iterable[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def render(metrics: Dict[str, dict]) -> str:
+    """Render merged metrics in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        names = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in metric["samples"].items():
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + [math.inf], value[:-1]):
+                cumulative += count
+                le = _format_value(float(bound))
+                lines.append(f"{name}_bucket{_labels(names, labels, ('le', le))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+async def _flush_loop(directory: str, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            write_snapshot(directory)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+def start_metrics_flusher() -> None:
+    """Start periodic snapshot writes when multi-worker aggregation is enabled."""
+    global _flush_task
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory or _flush_task is not None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _flush_task = asyncio.create_task(
+        _flush_loop(directory, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+    )
+
+
+async def stop_metrics_flusher() -> None:
+    global _flush_task
+    if _flush_task is None:
+        return
+    _flush_task.cancel()
+    try:
+        await _flush_task
+    except asyncio.CancelledError:
+        pass
+    _flush_task = None
+    try:
+        write_snapshot(settings.METRICS_MULTIPROC_DIR)
+    except OSError as e:
+        logger.warning(f"Could not write final metrics snapshot: {e}")
+
+
+# --- Application metrics ------------------------------------------------------
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "Total HTTP requests by method, route template and status code",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ("method", "route"),
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ("method",),
+)
+mongodb_command_duration_seconds = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by command name and outcome",
+    ("command", "status"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+mongodb_pool_checkout_wait_seconds = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the MongoDB pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
@@ -0,0 +1,235 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip is always available; brotli and zstd are offered when the ``brotli`` /
+``zstandard`` packages are installed. Streaming responses are compressed as
+they go, every chunk flushed so clients see data as soon as it is produced.
+
+Left alone: responses that already have a Content-Encoding (e.g. a gzip
+export), types outside the allowlist (including text/event-stream),
+bodies under the minimum size, and the excluded paths.
+
+A compressed body is a different representation, so a strong ETag on it
+gets the coding appended (``"x"`` -> ``"x-gzip"``, see
+app.conditional.encoded_etag). The routes strip it again when comparing
+If-Match and If-None-Match. A 304 echoes the tag the client sent.
+"""
+import zlib
+from typing import Callable, Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..conditional import encoded_etag, parse_etags, strip_coding
+from ..config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+)
+
+DEFAULT_EXCLUDED_PATHS = ("/api/health",)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encoders() -> Dict[str, Callable[[], object]]:
+    """Encoders this process can use, in order of preference."""
+    encoders: Dict[str, Callable[[], object]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = lambda: _Zstd(settings.COMPRESSION_ZSTD_LEVEL)
+    if brotli is not None:
+        encoders["br"] = lambda: _Brotli(settings.COMPRESSION_BROTLI_QUALITY)
+    encoders["gzip"] = lambda: _Gzip(settings.COMPRESSION_GZIP_LEVEL)
+    return encoders
+
+
+def choose_encoding(accept_encoding: str, offered: Iterable[str]) -> Optional[str]:
+    """
+    The first of ``offered`` the client accepts, or None.
+
+    Our preference order wins over the client's q-values; only q=0
+    (explicit refusal, also through ``*;q=0``) rules an encoding out.
+    """
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    wildcard = accepted.get("*")
+    for encoding in offered:
+        quality = accepted.get(encoding, wildcard)
+        if quality:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        compressible_types: Iterable[str] = COMPRESSIBLE_TYPES,
+        excluded_paths: Iterable[str] = DEFAULT_EXCLUDED_PATHS,
+    ):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.compressible_types = tuple(compressible_types)
+        self.excluded_paths = frozenset(excluded_paths)
+        self.encoders = available_encoders()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        accept_encoding = request_headers.get("accept-encoding", "")
+        encoding = choose_encoding(accept_encoding, self.encoders) if accept_encoding else None
+        responder = _CompressingResponder(self, send, encoding, request_headers.get("if-none-match"))
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: Optional[str],
+                 if_none_match: Optional[str] = None):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return content_type.startswith(self.middleware.compressible_types)
+
+    def _echo_validated_etag(self, headers: MutableHeaders) -> None:
+        # The route compared without the coding suffix; answer with the tag
+        # of the representation the client has cached
+        etag = headers["etag"]
+        for tag in parse_etags(self.if_none_match):
+            if tag != etag and strip_coding(tag) == etag:
+                headers["ETag"] = tag
+                return
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if message["status"] == 304 and self.if_none_match and "etag" in headers:
+                self._echo_validated_etag(headers)
+            if message["status"] in (204, 304) or not self._compressible(headers):
+                self.passthrough = True
+                await self._send(message)
+                return
+            # The body depends on Accept-Encoding from here on, for caches too
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is None:
+                self.passthrough = True
+                await self._send(message)
+                return
+            # Held back until the first body chunk shows whether to compress
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # Small complete body: not worth the bytes of a gzip header
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                headers["ETag"] = encoded_etag(etag, self.encoding)
+            self.encoder = self.middleware.encoders[self.encoding]()
+            if more_body:
+                del headers["Content-Length"]
+                await self._send(start)
+            else:
+                body = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+        if more_body:
+            chunk = self.encoder.compress(body) if body else b""
+        else:
+            chunk = self.encoder.finish(body)
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
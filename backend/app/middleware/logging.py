@@ -1,62 +1,97 @@
-from fastapi import Request
-from pythonjsonlogger import jsonlogger
 import logging
 import time
-from typing import Callable
 import uuid
 
-# Configure JSON logger
+from starlette.datastructures import URL, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import settings
+
+# Records propagate to the root handlers set up in logging_config, where a
+# SamplingFilter on this logger keeps errors and slow requests and samples
+# the rest (LOG_REQUEST_SAMPLE_RATE)
 logger = logging.getLogger("api")
-logHandler = logging.StreamHandler()
-formatter = jsonlogger.JsonFormatter(
-    fmt="%(asctime)s %(levelname)s %(name)s %(request_id)s %(method)s %(url)s %(status_code)s %(response_time)s %(message)s"
-)
-logHandler.setFormatter(formatter)
-logger.addHandler(logHandler)
-logger.setLevel(logging.INFO)
-
-async def logging_middleware(request: Request, call_next: Callable):
-    # Generate unique request ID
-    request_id = str(uuid.uuid4())
-    
-    # Add request ID to request state
-    request.state.request_id = request_id
-    
-    # Log request
-    logger.info(
-        "Request started",
-        extra={
-            "request_id": request_id,
-            "method": request.method,
-            "url": str(request.url),
-            "client_host": request.client.host if request.client else None,
-            "status_code": None,
-            "response_time": None
-        }
-    )
-    
-    # Time the request
-    start_time = time.time()
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Calculate processing time
-    process_time = time.time() - start_time
-    
-    # Log response
-    logger.info(
-        "Request completed",
-        extra={
-            "request_id": request_id,
-            "method": request.method,
-            "url": str(request.url),
-            "status_code": response.status_code,
-            "response_time": f"{process_time:.3f}s"
-        }
-    )
-    
-    # Add request ID to response headers
-    response.headers["X-Request-ID"] = request_id
-    
-    return response 
\ No newline at end of file
+
+
+class RequestLoggingMiddleware:
+    """
+    Logs one record per request and tags the response with ``X-Request-ID``
+    (pure ASGI, streaming safe). The id is also available to handlers as
+    ``request.state.request_id``.
+
+    The record is logged once the response headers are sent: ERROR for 5xx,
+    WARNING when slower than ``LOG_SLOW_REQUEST_SECONDS``, INFO otherwise.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate unique request ID
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        # Log request (debug only; the completion record carries the same fields)
+        if logger.isEnabledFor(logging.DEBUG):
+            client = scope.get("client")
+            logger.debug(
+                "Request started",
+                extra={
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "url": str(URL(scope=scope)),
+                    "client_host": client[0] if client else None,
+                }
+            )
+
+        # Time the request
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = time.perf_counter() - start_time
+                status_code = message["status"]
+
+                # Errors and slow requests are always kept, successful ones are sampled
+                if status_code >= 500:
+                    level = logging.ERROR
+                elif process_time >= settings.LOG_SLOW_REQUEST_SECONDS:
+                    level = logging.WARNING
+                else:
+                    level = logging.INFO
+
+                # Log response
+                if logger.isEnabledFor(level):
+                    logger.log(
+                        level,
+                        "Request completed",
+                        extra={
+                            "request_id": request_id,
+                            "method": scope["method"],
+                            "url": str(URL(scope=scope)),
+                            "status_code": status_code,
+                            "response_time": f"{process_time:.3f}s"
+                        }
+                    )
+
+                # Add request ID to response headers
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            logger.exception(
+                "Request failed",
+                extra={
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "url": str(URL(scope=scope)),
+                    "response_time": f"{time.perf_counter() - start_time:.3f}s"
+                }
+            )
+            raise
@@ -1,80 +1,142 @@
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable
-import time
-from ..config import settings
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-        
-        if settings.SECURITY_HEADERS:
-            # HSTS
-            if settings.is_production():
-                response.headers["Strict-Transport-Security"] = f"max-age={settings.HSTS_SECONDS}; includeSubDomains"
-            
-            # Frame options
-            if settings.FRAME_DENY:
-                response.headers["X-Frame-Options"] = "DENY"
-            
-            # XSS protection
-            if settings.XSS_PROTECTION:
-                response.headers["X-XSS-Protection"] = "1; mode=block"
-            
-            # Content type options
-            if settings.CONTENT_TYPE_NOSNIFF:
-                response.headers["X-Content-Type-Options"] = "nosniff"
-            
-            # Additional security headers
-            response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
-            response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-            
-            if settings.is_production():
-                response.headers["Content-Security-Policy"] = (
-                    "default-src 'self'; "
-                    "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
-                    "style-src 'self' 'unsafe-inline'; "
-                    "img-src 'self' data: https:; "
-                    "font-src 'self' data: https:; "
-                    "connect-src 'self' https:; "
-                    "frame-ancestors 'none';"
-                )
-        
-        return response
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-        self.requests = {}
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, List, Optional, Tuple
+from ..config import Settings, settings
+from ..ratelimit import RateLimiter, create_rate_limiter
+
+HeaderList = List[Tuple[bytes, bytes]]
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+    "style-src 'self' 'unsafe-inline'; "
+    "img-src 'self' data: https:; "
+    "font-src 'self' data: https:; "
+    "connect-src 'self' https:; "
+    "frame-ancestors 'none';"
+)
+
+# Responses that only carry machine-readable data and are polled often
+DEFAULT_ROUTE_PROFILES: Dict[str, str] = {
+    "/api/health": "minimal",
+}
+
+def build_security_headers(config: Settings = settings) -> Dict[str, HeaderList]:
+    """
+    Encode the security headers for each profile once, from ``config``.
+
+    ``minimal`` is for health checks, ``default`` for API responses and
+    ``strict`` for HTML pages, which additionally get cross-origin isolation
+    and a permissions policy.
+    """
+    minimal: List[Tuple[str, str]] = []
+    if config.is_production():
+        minimal.append(("Strict-Transport-Security", f"max-age={config.HSTS_SECONDS}; includeSubDomains"))
+    if config.CONTENT_TYPE_NOSNIFF:
+        minimal.append(("X-Content-Type-Options", "nosniff"))
+
+    default = list(minimal)
+    if config.FRAME_DENY:
+        default.append(("X-Frame-Options", "DENY"))
+    if config.XSS_PROTECTION:
+        default.append(("X-XSS-Protection", "1; mode=block"))
+    default.append(("X-Permitted-Cross-Domain-Policies", "none"))
+    default.append(("Referrer-Policy", "strict-origin-when-cross-origin"))
+    if config.is_production():
+        default.append(("Content-Security-Policy", CONTENT_SECURITY_POLICY))
+
+    strict = default + [
+        ("Cross-Origin-Opener-Policy", "same-origin"),
+        ("Permissions-Policy", "camera=(), microphone=(), geolocation=()"),
+    ]
+
+    profiles = {"minimal": minimal, "default": default, "strict": strict}
+    return {
+        name: [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers]
+        for name, headers in profiles.items()
+    }
+
+class SecurityHeadersMiddleware:
+    """
+    Appends a precomputed block of security headers to every HTTP response
+    (pure ASGI, streaming safe). Headers the response already has are kept
+    and not repeated.
+
+    The profile is picked by exact path from ``route_profiles``; otherwise
+    HTML responses get ``strict`` and everything else ``default``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: Settings = settings,
+        route_profiles: Optional[Dict[str, str]] = None,
+    ):
+        self.app = app
+        self.enabled = config.SECURITY_HEADERS
+        profiles = build_security_headers(config)
+        self.default = profiles["default"]
+        self.strict = profiles["strict"]
+        self.routes = {
+            path: profiles[name]
+            for path, name in (DEFAULT_ROUTE_PROFILES if route_profiles is None else route_profiles).items()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        block = self.routes.get(scope["path"])
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = message.setdefault("headers", [])
+                if not isinstance(headers, list):
+                    headers = message["headers"] = list(headers)
+                present = set()
+                html = False
+                for key, value in headers:
+                    key = key.lower()
+                    present.add(key)
+                    if key == b"content-type":
+                        html = value.startswith(b"text/html")
+                extra = block
+                if extra is None:
+                    extra = self.strict if html else self.default
+                # A header the route (or an inner middleware) set wins
+                headers.extend(item for item in extra if item[0] not in present)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Get client IP
-        client_ip = request.client.host
-        current_time = time.time()
-        
-        # Clean old requests
-        self.requests = {ip: reqs for ip, reqs in self.requests.items() 
-                        if current_time - reqs[-1] < 60}
-        
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
         # Check rate limit
-        if client_ip in self.requests:
-            requests = self.requests[client_ip]
-            if len(requests) >= settings.RATE_LIMIT_PER_MINUTE:
-                if current_time - requests[0] < 60:
-                    return Response(
-                        content="Rate limit exceeded",
-                        status_code=429
-                    )
-                self.requests[client_ip] = requests[1:] + [current_time]
-            else:
-                self.requests[client_ip].append(current_time)
-        else:
-            self.requests[client_ip] = [current_time]
-        
-        return await call_next(request)
+        if not await self.limiter.hit(client_ip):
+            response = Response(
+                content="Rate limit exceeded",
+                status_code=429
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
 
 def setup_security_middleware(app: FastAPI) -> None:
     """Setup all security related middleware"""
@@ -98,8 +160,9 @@ def setup_security_middleware(app: FastAPI) -> None:
     # Security Headers
     app.add_middleware(SecurityHeadersMiddleware)
     
-    # Rate Limiting
-    app.add_middleware(RateLimitMiddleware)
+    # Rate Limiting (backend is started/stopped by the app lifecycle events)
+    app.state.rate_limiter = create_rate_limiter()
+    app.add_middleware(RateLimitMiddleware, limiter=app.state.rate_limiter)
     
     # Trusted Hosts
     if settings.is_production():
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from .user import PydanticObjectId # Reuse ObjectId handler
 
@@ -29,7 +29,69 @@ class NoteInDB(NoteInDBBase):
     # Full object in DB
     pass
 
+class NotePartial(BaseModel):
+    # A note with only the fields asked for with `fields=` or `view=summary`
+    id: PydanticObjectId = Field(alias="_id")
+    title: Optional[str] = None
+    content: Optional[str] = None
+    preview: Optional[str] = None # Start of the content, NOTES_PREVIEW_CHARS characters at most
+    owner_id: Optional[PydanticObjectId] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        json_encoders = {datetime: lambda dt: dt.isoformat(), PydanticObjectId: str}
+        populate_by_name = True
+
 class NoteUpdate(BaseModel):
     title: Optional[str] = Field(None, max_length=255)
     content: Optional[str] = None
-    # updated_at will be set automatically in the update logic 
\ No newline at end of file
+    # updated_at will be set automatically in the update logic 
+class NoteImportError(BaseModel):
+    line: int # 1-based line number in the uploaded NDJSON, 0 for errors about the whole body
+    error: str
+
+class NoteImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[NoteImportError] # Capped at NOTES_IMPORT_MAX_ERRORS; failed has the full count
+
+class NoteBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None # Required for update and delete
+    title: Optional[str] = Field(None, max_length=255) # Required for create
+    content: Optional[str] = None # Required for create
+
+class NoteBatchRequest(BaseModel):
+    operations: List[NoteBatchOperation]
+
+class NoteBatchResult(BaseModel):
+    index: int # Position of the operation in the request
+    status: int # HTTP-style status of this operation: 200, 201, 400, 404 or 500
+    id: Optional[str] = None
+    updated_at: Optional[datetime] = None # Set for created and updated notes
+    error: Optional[str] = None
+
+class NoteBatchResponse(BaseModel):
+    results: List[NoteBatchResult]
+
+class NoteTombstone(BaseModel):
+    id: str
+    deleted_at: datetime
+
+class NoteChanges(BaseModel):
+    notes: List[Note] # Created or updated since the token
+    deleted: List[NoteTombstone]
+    sync_token: str # Pass as `since` on the next call
+    complete: bool # False if more changes are waiting; call again right away
+
+class NoteSearchHit(BaseModel):
+    id: str
+    title: str
+    snippet: str # Part of the content around the first match
+    score: float # Text search relevance; higher is better
+    updated_at: datetime
+
+class NoteSuggestion(BaseModel):
+    id: str
+    title: str
@@ -17,8 +17,9 @@ class PydanticObjectId(ObjectId):
         return v
 
     @classmethod
-    def __get_pydantic_json_schema__(cls, field_schema: Dict[str, Any], field_name: str) -> None:
-        field_schema.update(type="string")
+    def __get_pydantic_json_schema__(cls, core_schema: Any, handler: Any) -> Dict[str, Any]:
+        # Serialized as its hex string
+        return {"type": "string"}
         
     # Thêm phương thức này để hỗ trợ OpenAPI schema
     @classmethod
@@ -36,6 +37,7 @@ class UserCreate(UserBase):
 class UserInDBBase(UserBase):
     id: PydanticObjectId = Field(default_factory=PydanticObjectId, alias="_id") # Map MongoDB's _id
     hashed_password: str
+    token_version: int = 0 # Bumped to revoke all issued tokens
 
     class Config:
         from_attributes = True # Replace orm_mode
@@ -0,0 +1,97 @@
+"""
+Incremental reader for newline-delimited JSON request bodies.
+
+Bodies are consumed chunk by chunk as the client sends them, so memory use
+is bounded by the longest accepted line, not by the size of the body.
+"""
+import zlib
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+# Upper bound on decompressed bytes produced from one received chunk
+DECOMPRESS_CHUNK_BYTES = 256 * 1024
+
+
+class _GzipDecoder:
+    """Streaming gzip decoder; concatenated members decode as one body, like ``gzip.decompress``."""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(31)
+
+    @property
+    def complete(self) -> bool:
+        """Whether the body so far ends exactly at the end of a gzip member."""
+        return self._decompressor.eof and not self._decompressor.unused_data
+
+    def decode(self, chunk: bytes) -> Iterator[bytes]:
+        while True:
+            decompressor = self._decompressor
+            # max_length keeps a small, highly compressed chunk from expanding at once
+            yield decompressor.decompress(chunk, DECOMPRESS_CHUNK_BYTES)
+            while decompressor.unconsumed_tail:
+                yield decompressor.decompress(decompressor.unconsumed_tail, DECOMPRESS_CHUNK_BYTES)
+            if not (decompressor.eof and decompressor.unused_data):
+                return
+            # Data after the end of a member starts the next one
+            chunk = decompressor.unused_data
+            self._decompressor = zlib.decompressobj(31)
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int,
+    gzip: bool = False,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield ``(line_number, line)`` for every non-blank line of the body.
+
+    Line numbers start at 1 and count blank lines. A line longer than
+    ``max_line_bytes`` is yielded as ``None`` and never buffered in full.
+    Raises ``zlib.error`` if ``gzip`` is set and the body is not valid gzip,
+    and ``EOFError`` if it ends before the end of a gzip member (truncated);
+    the incomplete last line is not yielded then.
+    """
+    decoder = _GzipDecoder() if gzip else None
+    pending = bytearray()
+    skipping = False  # inside a line that is already too long
+    line_number = 0
+
+    async for chunk in chunks:
+        pieces = decoder.decode(chunk) if decoder is not None else (chunk,)
+        for data in pieces:
+            start = 0
+            while True:
+                newline = data.find(b"\n", start)
+                if newline < 0:
+                    if not skipping:
+                        pending += data[start:]
+                        if len(pending) > max_line_bytes:
+                            skipping = True
+                            pending.clear()
+                    break
+
+                line_number += 1
+                segment = data[start:newline]
+                start = newline + 1
+                if skipping:
+                    skipping = False
+                    yield line_number, None
+                    continue
+                if pending:
+                    pending += segment
+                    line = bytes(pending)
+                    pending.clear()
+                else:
+                    line = segment
+                if len(line) > max_line_bytes:
+                    yield line_number, None
+                elif line.strip():
+                    yield line_number, line
+
+    if decoder is not None and not decoder.complete:
+        raise EOFError("truncated gzip body")
+
+    # Last line without a trailing newline
+    if skipping:
+        yield line_number + 1, None
+    elif pending.strip():
+        yield line_number + 1, bytes(pending)
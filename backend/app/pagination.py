@@ -0,0 +1,55 @@
+"""
+Opaque cursor tokens for keyset pagination.
+
+A cursor is the sort key of the last item of a page, serialized to JSON and
+base64url encoded. Clients must treat it as an opaque string.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(*values: Any) -> str:
+    parts = []
+    for value in values:
+        if isinstance(value, datetime):
+            parts.append({"d": value.isoformat()})
+        elif isinstance(value, ObjectId):
+            parts.append({"o": str(value)})
+        else:
+            parts.append(value)
+    raw = json.dumps(parts, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> List[Any]:
+    """Decode a cursor produced by ``encode_cursor``. Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        parts = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(parts, list):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    try:
+        for part in parts:
+            if isinstance(part, dict) and "d" in part:
+                values.append(datetime.fromisoformat(part["d"]))
+            elif isinstance(part, dict) and "o" in part:
+                if not ObjectId.is_valid(part["o"]):
+                    raise ValueError("Invalid cursor")
+                values.append(ObjectId(part["o"]))
+            elif part is None or isinstance(part, (str, int, float)):
+                values.append(part)
+            else:
+                # Anything else would reach the query as is
+                raise ValueError("Invalid cursor")
+    except (TypeError, ValueError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
+    return values
@@ -0,0 +1,35 @@
+from app.config import settings
+from .base import RateLimiter
+from .memory import InMemoryRateLimiter
+
+__all__ = [
+    "RateLimiter",
+    "InMemoryRateLimiter",
+    "create_rate_limiter",
+]
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limit backend selected by ``RATE_LIMIT_BACKEND``."""
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    limit = settings.RATE_LIMIT_PER_MINUTE
+
+    if backend == "memory":
+        return InMemoryRateLimiter(limit=limit, period=60, max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if backend == "shared":
+        from .shared import SharedMemoryRateLimiter
+        return SharedMemoryRateLimiter(
+            limit=limit,
+            path=settings.RATE_LIMIT_SHARED_PATH,
+            period=60,
+            slots=settings.RATE_LIMIT_SHARED_SLOTS,
+        )
+    if backend == "mongo":
+        from .mongo import MongoRateLimiter
+        return MongoRateLimiter(
+            limit=limit,
+            period=60,
+            sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS,
+            max_keys=settings.RATE_LIMIT_MAX_KEYS,
+        )
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
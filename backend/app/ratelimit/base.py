@@ -0,0 +1,17 @@
+class RateLimiter:
+    """
+    Interface implemented by all rate limit backends.
+
+    ``hit`` records one request for ``key`` and returns False when the key is
+    over its limit. ``start`` and ``close`` are called from the application
+    startup and shutdown events for backends that need background work.
+    """
+
+    async def hit(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
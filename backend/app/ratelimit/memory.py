@@ -0,0 +1,91 @@
+"""
+In-process sliding-window rate limiter.
+
+Each client key keeps two fixed-window counters (previous and current window).
+The request rate is estimated as ``previous * (1 - elapsed) + current``, the
+usual sliding-window-counter approximation. Every check touches a single dict
+entry, so the cost per request does not depend on how many clients are tracked.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .base import RateLimiter
+
+
+class _Window:
+    __slots__ = ("window", "previous", "current")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.previous = 0
+        self.current = 0
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Sliding-window counter per key with LRU eviction.
+
+    Entries are kept in least-recently-used order. Whenever a key is added or
+    rolls over to a new window, a few idle entries are expired from the cold
+    end of the LRU list (amortized cleanup, no full scans). The table never
+    grows past ``max_keys``.
+    """
+
+    # Idle entries expired per insert/rollover; keeps cleanup O(1) amortized
+    EXPIRE_BATCH = 2
+
+    def __init__(self, limit: int, period: float = 60.0, max_keys: int = 100_000):
+        self.limit = limit
+        self.period = float(period)
+        self.max_keys = max_keys
+        self.evictions = 0
+        self._entries: "OrderedDict[str, _Window]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def hit(self, key: str) -> bool:
+        return self.check(key)
+
+    def check(self, key: str, now: Optional[float] = None) -> bool:
+        """Record a request for ``key``. Returns False if it exceeds the limit."""
+        if now is None:
+            now = time.monotonic()
+        window = int(now // self.period)
+        entries = self._entries
+
+        entry = entries.get(key)
+        if entry is None:
+            if len(entries) >= self.max_keys:
+                entries.popitem(last=False)
+                self.evictions += 1
+            entry = entries[key] = _Window(window)
+            self._expire(window)
+        else:
+            entries.move_to_end(key)
+            if entry.window != window:
+                entry.previous = entry.current if entry.window == window - 1 else 0
+                entry.current = 0
+                entry.window = window
+                self._expire(window)
+
+        elapsed = (now % self.period) / self.period
+        if entry.previous * (1.0 - elapsed) + entry.current >= self.limit:
+            return False
+        entry.current += 1
+        return True
+
+    def _expire(self, window: int) -> None:
+        # Entries untouched for two full windows no longer affect any estimate
+        entries = self._entries
+        for _ in range(self.EXPIRE_BATCH):
+            if not entries:
+                return
+            key, oldest = next(iter(entries.items()))
+            if oldest.window >= window - 1:
+                return
+            del entries[key]
+
+    def reset(self) -> None:
+        self._entries.clear()
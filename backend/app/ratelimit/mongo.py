@@ -0,0 +1,161 @@
+"""
+Rate limiter shared across hosts through MongoDB.
+
+Each (key, window) pair is one document in the ``rate_limits`` collection,
+incremented atomically with ``$inc`` and removed by a TTL index once the
+window is no longer needed. Requests are never sent to MongoDB one by one:
+every worker counts locally and a background task flushes the increments in
+one ``bulk_write`` and refreshes the global counts in one ``find`` per
+``sync_interval``. Between syncs a worker decides from the last global counts
+plus its own unsynced hits, so the limit can be overshot by at most what the
+other workers accept within one sync interval.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+from app.database import get_mongo_db
+from .base import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class _KeyState:
+    __slots__ = ("window", "previous", "current")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.previous = 0
+        self.current = 0
+
+
+class MongoRateLimiter(RateLimiter):
+    def __init__(
+        self,
+        limit: int,
+        period: float = 60.0,
+        sync_interval: float = 1.0,
+        max_keys: int = 100_000,
+        collection_name: str = "rate_limits",
+    ):
+        self.limit = limit
+        self.period = float(period)
+        self.sync_interval = sync_interval
+        self.max_keys = max_keys
+        self.collection_name = collection_name
+        self._keys: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self._pending: Dict[Tuple[str, int], int] = {}
+        self._touched: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def hit(self, key: str) -> bool:
+        now = time.time()
+        window = int(now // self.period)
+        keys = self._keys
+        self._touched.add(key)
+
+        state = keys.get(key)
+        if state is None:
+            if len(keys) >= self.max_keys:
+                keys.popitem(last=False)
+            state = keys[key] = _KeyState(window)
+        else:
+            keys.move_to_end(key)
+            if state.window != window:
+                state.previous = state.current if state.window == window - 1 else 0
+                state.current = 0
+                state.window = window
+
+        elapsed = (now % self.period) / self.period
+        if state.previous * (1.0 - elapsed) + state.current >= self.limit:
+            return False
+        state.current += 1
+        pending_key = (key, window)
+        self._pending[pending_key] = self._pending.get(pending_key, 0) + 1
+        return True
+
+    async def start(self) -> None:
+        collection = get_mongo_db()[self.collection_name]
+        await collection.create_indexes([
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        ])
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.warning(f"Final rate limit sync failed: {e}")
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Rate limit sync failed, keeping local counts: {e}")
+
+    async def sync(self) -> None:
+        """Flush local increments and refresh global counts for keys hit since the last sync."""
+        pending, self._pending = self._pending, {}
+        touched, self._touched = self._touched, set()
+        if not pending and not touched:
+            return
+        window = int(time.time() // self.period)
+
+        collection = get_mongo_db()[self.collection_name]
+        try:
+            if pending:
+                await collection.bulk_write(
+                    [
+                        UpdateOne(
+                            {"_id": f"{key}:{key_window}"},
+                            {
+                                "$inc": {"count": count},
+                                "$setOnInsert": {
+                                    "expires_at": datetime.fromtimestamp(
+                                        (key_window + 2) * self.period, timezone.utc
+                                    )
+                                },
+                            },
+                            upsert=True,
+                        )
+                        for (key, key_window), count in pending.items()
+                    ],
+                    ordered=False,
+                )
+        except Exception:
+            # Put the increments back so they are retried on the next sync
+            for pending_key, count in pending.items():
+                self._pending[pending_key] = self._pending.get(pending_key, 0) + count
+            self._touched |= touched
+            raise
+
+        ids = [f"{key}:{w}" for key in touched for w in (window - 1, window)]
+        counts = {}
+        async for doc in collection.find({"_id": {"$in": ids}}, {"count": 1}):
+            counts[doc["_id"]] = doc["count"]
+
+        for key in touched:
+            state = self._keys.get(key)
+            if state is None:
+                continue
+            # Hits accepted while this sync was in flight are not in MongoDB yet
+            unsynced = self._pending.get((key, window), 0)
+            state.window = window
+            state.previous = counts.get(f"{key}:{window - 1}", 0)
+            state.current = counts.get(f"{key}:{window}", 0) + unsynced
@@ -0,0 +1,110 @@
+"""
+Rate limiter shared by all worker processes on one host.
+
+Counters live in a memory-mapped file (``/dev/shm`` by default) laid out as a
+4-way set-associative table: a key hashes to one bucket of four slots, and
+only that bucket is locked (``fcntl`` byte-range lock) while it is updated.
+Workers therefore never contend on a global lock, and a limit of N per minute
+holds across every uvicorn worker instead of N per worker.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import time
+from typing import Optional
+
+from .base import RateLimiter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# fingerprint, window, previous count, current count
+_SLOT = struct.Struct("<QqII")
+_WAYS = 4
+_BUCKET_SIZE = _SLOT.size * _WAYS
+_MAX_COUNT = 0xFFFFFFFF
+
+
+class SharedMemoryRateLimiter(RateLimiter):
+    """
+    Sliding-window counters in a shared memory-mapped file.
+
+    Uses the same previous/current window estimate as ``InMemoryRateLimiter``.
+    When all four slots of a bucket hold active keys, the slot with the least
+    traffic is reused, so a collision can only make limiting stricter, never
+    looser. Size ``slots`` well above the number of concurrent clients.
+    """
+
+    def __init__(self, limit: int, path: str, period: float = 60.0, slots: int = 65536):
+        if fcntl is None:
+            raise RuntimeError("Shared memory rate limiting requires fcntl (POSIX only)")
+        self.limit = limit
+        self.period = float(period)
+        self.buckets = max(1, slots // _WAYS)
+        self.path = path
+
+        size = self.buckets * _BUCKET_SIZE
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        # Every worker may race here; growing to the same size is harmless
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    async def hit(self, key: str) -> bool:
+        return self.check(key)
+
+    def check(self, key: str, now: Optional[float] = None) -> bool:
+        """Record a request for ``key``. Returns False if it exceeds the limit."""
+        if now is None:
+            now = time.time()
+        window = int(now // self.period)
+        digest = int.from_bytes(
+            hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+        )
+        fingerprint = digest | 1  # 0 marks an empty slot
+        offset = (digest >> 1) % self.buckets * _BUCKET_SIZE
+
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _BUCKET_SIZE, offset)
+        try:
+            slot_offset, previous, current = self._find_slot(offset, fingerprint, window)
+            elapsed = (now % self.period) / self.period
+            allowed = previous * (1.0 - elapsed) + current < self.limit
+            if allowed and current < _MAX_COUNT:
+                current += 1
+            _SLOT.pack_into(self._map, slot_offset, fingerprint, window, previous, current)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _BUCKET_SIZE, offset)
+        return allowed
+
+    def _find_slot(self, offset: int, fingerprint: int, window: int):
+        """Return ``(slot_offset, previous, current)`` for the key, rolled to ``window``."""
+        victim = None
+        victim_load = None
+        for way in range(_WAYS):
+            slot_offset = offset + way * _SLOT.size
+            slot_fp, slot_window, previous, current = _SLOT.unpack_from(self._map, slot_offset)
+            if slot_fp == fingerprint:
+                if slot_window == window:
+                    return slot_offset, previous, current
+                if slot_window == window - 1:
+                    return slot_offset, current, 0
+                return slot_offset, 0, 0
+            # Empty or idle slots are free; otherwise prefer the quietest one
+            load = -1 if slot_window < window - 1 else previous + current
+            if victim is None or load < victim_load:
+                victim, victim_load = slot_offset, load
+
+        if victim_load >= 0:
+            # Bucket is full of active keys; share the quietest slot's counts
+            _, slot_window, previous, current = _SLOT.unpack_from(self._map, victim)
+            if slot_window == window - 1:
+                return victim, current, 0
+            return victim, previous, current
+        return victim, 0, 0
+
+    async def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
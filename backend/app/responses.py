@@ -0,0 +1,74 @@
+"""
+Fast JSON responses for documents read from MongoDB.
+
+Routes keep their ``response_model`` (it still drives the OpenAPI schema) but
+may return a ``FastJSONResponse`` built from raw documents instead of model
+instances; FastAPI then sends it as is, without validating and serializing
+every item through pydantic again. Only use this for documents the app wrote
+itself, whose shape already matches the model.
+
+orjson is used when installed (``pip install orjson``), the standard library
+encoder otherwise; both produce the same JSON for these documents.
+"""
+import json
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Callable, Sequence, Type
+
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(content: Any) -> bytes:
+        return _encoder.encode(content).encode()
+
+
+def key_encoder(keys: Sequence[str]) -> Callable[[dict], dict]:
+    """
+    Build a function copying ``keys``, in that order, out of a document.
+
+    Values are copied without validation; ObjectIds and datetimes are
+    converted by ``dumps``.
+    """
+    keys = tuple(keys)
+    getter = itemgetter(*keys)
+    if len(keys) == 1:
+        return lambda doc: {keys[0]: getter(doc)}
+    return lambda doc: dict(zip(keys, getter(doc)))
+
+
+def document_encoder(model: Type[BaseModel]) -> Callable[[dict], dict]:
+    """
+    Build a function mapping a document to ``model``'s JSON shape.
+
+    Keys are the model's field aliases in field order, as response_model
+    serialization would produce them.
+    """
+    return key_encoder(field.alias or name for name, field in model.model_fields.items())
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -9,8 +9,8 @@ from app.database import get_mongo_db
 from app.models.user import User, UserCreate, UserInDB # Import MongoDB models
 from app.schemas.user import AuthResponse, UserOut # Keep existing response schemas if suitable
 from app.security import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
     get_current_user,
     oauth2_scheme # Import oauth2_scheme if needed here
@@ -31,13 +31,13 @@ async def register(
     # Check if user already exists
     existing_user = await db["users"].find_one({"email": user.email})
     if existing_user:
-        logger.warning(f"Registration attempt for existing email: {user.email}")
+        logger.warning("Registration attempt for existing email: %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Email already registered"
         )
         
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     # Create UserInDB object (prepare for DB insertion)
     user_in_db = UserInDB(
         email=user.email, 
@@ -83,21 +83,27 @@ async def login(
     Uses standard OAuth2PasswordRequestForm.
     Sets token in an HTTP-only cookie.
     """
-    logger.debug(f"Login attempt for user: {form_data.username}")
+    logger.debug("Login attempt for user: %s", form_data.username)
     user_data = await db["users"].find_one({"email": form_data.username}) # username is the email here
     
-    if not user_data or not verify_password(form_data.password, user_data["hashed_password"]):
-        logger.warning(f"Failed login attempt for user: {form_data.username}")
+    if not user_data or not await verify_password_async(form_data.password, user_data["hashed_password"]):
+        # Repeats for one user are collapsed by the log's repeat filter; other users stay separate
+        logger.warning("Failed login attempt for user: %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"}, # Keep Bearer for potential non-cookie clients
         )
     
-    logger.info(f"User authenticated successfully: {form_data.username}")
+    logger.info("User authenticated successfully: %s", form_data.username)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_data["email"]}, expires_delta=access_token_expires
+        data={
+            "sub": user_data["email"],
+            "uid": str(user_data["_id"]),
+            "ver": user_data.get("token_version", 0)
+        },
+        expires_delta=access_token_expires
     )
     
     # Set the token in an HTTP-only cookie for security
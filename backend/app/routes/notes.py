@@ -1,137 +1,884 @@
+import asyncio
+import hashlib
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+import re
+import zlib
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List
-from datetime import datetime
+from pydantic import ValidationError
+from pymongo import ASCENDING, DESCENDING, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ExecutionTimeout
+from functools import lru_cache
+from typing import Annotated, AsyncIterator, Callable, List, Literal, Optional, Tuple, Union
+from datetime import datetime, timedelta
 from bson import ObjectId
 
+from app.changefeed import note_changes
+from app.conditional import http_date, not_modified, parse_etags, strip_coding
+from app.config import settings
 from app.database import get_mongo_db
-from app.models.note import Note, NoteCreate, NoteUpdate, NoteInDB
-from app.models.user import UserInDB
-from app.security import get_current_user
+from app.ndjson import iter_lines
+from app.pagination import encode_cursor, decode_cursor
+from app.responses import FastJSONResponse, document_encoder, key_encoder
+from app.models.note import (
+    Note, NoteCreate, NotePartial, NoteUpdate, NoteInDB, NoteImportError, NoteImportResult,
+    NoteBatchRequest, NoteBatchResponse, NoteBatchResult, NoteChanges, NoteTombstone,
+    NoteSearchHit, NoteSuggestion
+)
+from app.security import get_current_user_id
+from app.titles import normalize_prefix, with_title_norm
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/", response_model=List[Note])
+# Keyset order for note lists, backed by the (owner_id, updated_at, _id) index
+NOTES_SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+
+def _after_cursor(last_updated_at: datetime, last_id: ObjectId) -> dict:
+    """Filter for notes that sort after (updated_at, _id) in NOTES_SORT order."""
+    return {"$or": [
+        {"updated_at": {"$lt": last_updated_at}},
+        {"updated_at": last_updated_at, "_id": {"$lt": last_id}},
+    ]}
+
+# Deleted notes stay behind as tombstones ({deleted: true, deleted_at}) until
+# the TTL index on deleted_at removes them, so /changes can report deletions.
+# Every read of live notes must include this filter.
+NOT_DELETED = {"deleted": {"$ne": True}}
+
+def _tombstone_update(now: datetime) -> dict:
+    """Soft delete: keep only what a sync client needs to drop the note."""
+    return {
+        "$set": {"deleted": True, "deleted_at": now, "updated_at": now},
+        "$unset": {"title": "", "title_norm": "", "content": ""},
+    }
+
+def _utcnow() -> datetime:
+    """Current UTC time truncated to the millisecond precision BSON stores."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+# Note documents straight to response JSON, see app.responses
+_encode_note = document_encoder(Note)
+
+# Fields that can be picked with fields= on note lists, in response order;
+# _id is always returned
+NOTE_FIELDS = ("title", "content", "preview", "owner_id", "created_at", "updated_at")
+SUMMARY_FIELDS = ("title", "preview", "updated_at")
+
+def _parse_fields(fields: Optional[str], view: str) -> Optional[Tuple[str, ...]]:
+    """Requested note fields, or None for full notes."""
+    if fields is None:
+        return SUMMARY_FIELDS if view == "summary" else None
+    requested = {field.strip() for field in fields.split(",")} - {"", "_id", "id"}
+    unknown = requested.difference(NOTE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in NOTE_FIELDS if field in requested)
+
+def _fields_projection(fields: Tuple[str, ...]) -> dict:
+    # updated_at is always read, the next page cursor is built from it
+    projection = {"updated_at": 1}
+    for field in fields:
+        if field == "preview":
+            projection["preview"] = {"$substrCP": ["$content", 0, settings.NOTES_PREVIEW_CHARS]}
+        else:
+            projection[field] = 1
+    return projection
+
+@lru_cache(maxsize=64)
+def _fields_encoder(fields: Tuple[str, ...]) -> Callable[[dict], dict]:
+    return key_encoder(("_id",) + fields)
+
+# Conditional requests. Responses carry validators and must be revalidated
+# before a cached copy is used
+NOTE_CACHE_CONTROL = "private, no-cache"
+_EPOCH = datetime(1970, 1, 1)
+
+def _millis(value: datetime) -> int:
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(milliseconds=1)
+
+def _note_etag(note_id: ObjectId, updated_at: datetime) -> str:
+    """Strong ETag of one note version: "<id>-<updated_at in ms>"."""
+    return f'"{note_id}-{_millis(updated_at)}"'
+
+def _note_validators(doc: dict) -> dict:
+    return {
+        "ETag": _note_etag(doc["_id"], doc["updated_at"]),
+        "Last-Modified": http_date(doc["updated_at"]),
+        "Cache-Control": NOTE_CACHE_CONTROL,
+    }
+
+def _if_match_filter(if_match: str, note_id: ObjectId) -> Optional[dict]:
+    """
+    Update filter condition for an If-Match header, so the check and the
+    write are one atomic operation. None if no listed tag can match.
+    """
+    tags = parse_etags(if_match)
+    if tags == ["*"]:
+        return {}
+    prefix = f'"{note_id}-'
+    versions = []
+    for tag in tags:
+        # Tags of compressed responses name the same version
+        tag = strip_coding(tag)
+        # Weak tags (W/"...") never match: If-Match uses strong comparison
+        if tag.startswith(prefix) and tag.endswith('"'):
+            try:
+                versions.append(_EPOCH + timedelta(milliseconds=int(tag[len(prefix):-1])))
+            except ValueError:
+                continue
+    if not versions:
+        return None
+    return {"updated_at": {"$in": versions}}
+
+def _list_etag(notes: List[dict], query_string: str) -> str:
+    """
+    ETag of a note list page: a hash of the request parameters and of the
+    id and updated_at of every note on the page.
+    
+    Every write bumps updated_at, so the tag changes exactly when the page
+    would: a note on it is edited or deleted, or another one moves into it.
+    """
+    digest = hashlib.blake2b(query_string.encode(), digest_size=12)
+    for note in notes:
+        digest.update(b"%s:%d;" % (note["_id"].binary, _millis(note["updated_at"])))
+    return f'"l-{digest.hexdigest()}"'
+
+def _parse_note_id(note_id: str) -> ObjectId:
+    if not ObjectId.is_valid(note_id):
+        raise HTTPException(status_code=400, detail="Invalid note ID format")
+    return ObjectId(note_id)
+
+@router.get("/", response_model=Union[List[Note], List[NotePartial]])
 async def get_notes(
-    skip: int = 0,
-    limit: int = 10,
-    current_user: UserInDB = Depends(get_current_user),
+    request: Request,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated: " + ", ".join(NOTE_FIELDS)),
+    view: Literal["full", "summary"] = "full",
+    skip: int = Query(0, ge=0, deprecated=True),
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Get list of notes for the current user, most recently updated first.
+    
+    Pages are linked by an opaque cursor: pass the X-Next-Cursor header of
+    one response as ``cursor`` to get the next page. The header is absent on
+    the last page. ``skip`` is deprecated; it still works but gets slower the
+    deeper the page.
+    
+    By default whole notes are returned. ``view=summary`` returns only the
+    title, a short ``preview`` of the content and updated_at; ``fields``
+    picks any set of fields instead. Only the requested fields are read
+    from the database.
+    
+    Responses carry an ETag; send it back as If-None-Match to get a 304
+    while the page is unchanged. The page is still read, but not encoded
+    or sent.
+    """
+    selected = _parse_fields(fields, view)
+    query = {"owner_id": owner_id, **NOT_DELETED}
+    if cursor:
+        try:
+            last_updated_at, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(last_updated_at, datetime) or not isinstance(last_id, ObjectId):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query.update(_after_cursor(last_updated_at, last_id))
+    
+    projection = NOTE_PROJECTION if selected is None else _fields_projection(selected)
+    notes_cursor = db["notes"].find(query, projection).sort(NOTES_SORT).limit(limit)
+    if skip and not cursor:
+        notes_cursor = notes_cursor.skip(skip)
+    notes = await notes_cursor.to_list(length=limit)
+    
+    etag = _list_etag(notes, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": NOTE_CACHE_CONTROL}
+    if not_modified(if_none_match, None, etag):
+        return Response(status_code=304, headers=headers)
+    
+    if len(notes) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(
+            notes[-1]["updated_at"], notes[-1]["_id"]
+        )
+    encode = _encode_note if selected is None else _fields_encoder(selected)
+    return FastJSONResponse([encode(note) for note in notes], headers=headers)
+
+# Characters of content returned as a search snippet
+SEARCH_SNIPPET_CHARS = 160
+
+# First search term that is not negated ("-word"), used to place the snippet
+_SEARCH_TERM = re.compile(r"(?<![-\w])\w+")
+
+def _search_pipeline(owner_id: ObjectId, q: str, after: Optional[tuple], limit: int) -> list:
+    match = _SEARCH_TERM.search(q)
+    term = match.group(0).lower() if match else ""
+    pipeline = [
+        {"$match": {"$text": {"$search": q}, "owner_id": owner_id, **NOT_DELETED}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after is not None:
+        last_score, last_id = after
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": last_score}},
+            {"score": last_score, "_id": {"$lt": last_id}},
+        ]}})
+    pipeline += [
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "title": 1,
+            "updated_at": 1,
+            "score": 1,
+            # Content around the first literal hit of the term; the start of
+            # the content when only a stemmed form matched
+            "snippet": {"$let": {
+                "vars": {"at": {"$indexOfCP": [{"$toLower": "$content"}, term]}},
+                "in": {"$substrCP": [
+                    "$content",
+                    {"$max": [0, {"$subtract": ["$$at", SEARCH_SNIPPET_CHARS // 4]}]},
+                    SEARCH_SNIPPET_CHARS,
+                ]},
+            }},
+        }},
+    ]
+    return pipeline
+
+@router.get("/search", response_model=List[NoteSearchHit])
+async def search_notes(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=256),
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Full-text search of the current user's notes, best match first.
+    
+    ``q`` uses MongoDB text search syntax: words, "quoted phrases" and
+    -excluded words. Pages are linked by the X-Next-Cursor header, as in
+    the note list. A query running longer than NOTES_SEARCH_MAX_TIME_MS is
+    aborted with 503.
+    """
+    after = None
+    if cursor:
+        try:
+            last_score, last_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not isinstance(last_score, (int, float)) or not isinstance(last_id, ObjectId):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (last_score, last_id)
+    
+    try:
+        hits = await (
+            db["notes"]
+            .aggregate(_search_pipeline(owner_id, q, after, limit),
+                       maxTimeMS=settings.NOTES_SEARCH_MAX_TIME_MS)
+            .to_list(length=limit)
+        )
+    except ExecutionTimeout:
+        logger.warning(f"Note search timed out after {settings.NOTES_SEARCH_MAX_TIME_MS}ms")
+        raise HTTPException(status_code=503, detail="Search took too long, try a more specific query")
+    
+    if len(hits) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(hits[-1]["score"], hits[-1]["_id"])
+    return [
+        NoteSearchHit(id=str(hit["_id"]), title=hit["title"], snippet=hit["snippet"],
+                      score=hit["score"], updated_at=hit["updated_at"])
+        for hit in hits
+    ]
+
+@router.get("/suggest", response_model=List[NoteSuggestion])
+async def suggest_notes(
+    prefix: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(10, ge=1, le=50),
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Notes whose title starts with ``prefix``, for autocomplete.
+    
+    Matching ignores case, accents and repeated spaces (see app.titles).
+    Results are in title order.
+    """
+    start = normalize_prefix(prefix)
+    if not start:
+        return []
+    # An anchored literal regex is an index range scan from `start`; no upper
+    # bound is computed by hand (bumping the last character can produce a
+    # lone surrogate that BSON cannot encode)
+    notes = await (
+        db["notes"]
+        .find(
+            {
+                "owner_id": owner_id,
+                "title_norm": {"$gte": start, "$regex": f"^{re.escape(start)}"},
+                **NOT_DELETED,
+            },
+            {"title": 1},
+        )
+        .sort("title_norm", ASCENDING)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+    return [NoteSuggestion(id=str(note["_id"]), title=note["title"]) for note in notes]
+
+# Fields of Note, in response order
+NOTE_PROJECTION = {"title": 1, "content": 1, "owner_id": 1, "created_at": 1, "updated_at": 1}
+
+# Lines are buffered into chunks of about this size before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def _note_json(doc: dict) -> str:
+    """One note as JSON, in the same shape as the Note response model."""
+    return json.dumps({
+        "_id": str(doc["_id"]),
+        "title": doc["title"],
+        "content": doc["content"],
+        "owner_id": str(doc["owner_id"]),
+        "created_at": doc["created_at"].isoformat(),
+        "updated_at": doc["updated_at"].isoformat(),
+    }, ensure_ascii=False)
+
+async def _export_chunks(
+    db: AsyncIOMotorDatabase, owner_id: ObjectId, compress: bool
+) -> AsyncIterator[bytes]:
+    """
+    Yield all of a user's notes as NDJSON, optionally gzip-compressed.
+
+    At most one cursor batch and one output chunk are held in memory.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    cursor = (
+        db["notes"]
+        .find({"owner_id": owner_id, **NOT_DELETED}, NOTE_PROJECTION)
+        .sort(NOTES_SORT)
+        .batch_size(settings.NOTES_EXPORT_BATCH_SIZE)
+    )
+    buffer: List[str] = []
+    buffered = 0
+    try:
+        async for doc in cursor:
+            line = _note_json(doc)
+            buffer.append(line)
+            buffered += len(line) + 1
+            if buffered >= EXPORT_CHUNK_BYTES:
+                chunk = ("\n".join(buffer) + "\n").encode()
+                buffer, buffered = [], 0
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                yield chunk
+        chunk = ("\n".join(buffer) + "\n").encode() if buffer else b""
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+    finally:
+        # Also runs when the client disconnects mid-export
+        await cursor.close()
+
+@router.get("/export")
+async def export_notes(
+    compress: bool = Query(False, description="gzip the stream (Content-Encoding: gzip)"),
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Stream every note of the current user as newline-delimited JSON,
+    most recently updated first. Each line has the shape of a Note.
+    """
+    headers = {"Content-Disposition": 'attachment; filename="notes.ndjson"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _export_chunks(db, owner_id, compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+# Oldest first, so a sync can be resumed from the last change it received
+CHANGES_SORT = [("updated_at", ASCENDING), ("_id", ASCENDING)]
+
+def _sync_token(safe_point: datetime, last: Optional[dict] = None) -> str:
+    """
+    ``safe_point``: every change older than this has been delivered.
+    ``last``: the last change of an incomplete page, to continue after it.
+    """
+    if last is None:
+        return encode_cursor("c", safe_point)
+    return encode_cursor("p", safe_point, last["updated_at"], last["_id"])
+
+def _parse_sync_token(token: str) -> tuple:
+    try:
+        parts = decode_cursor(token)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    valid = (
+        (len(parts) == 2 and parts[0] == "c") or
+        (len(parts) == 4 and parts[0] == "p" and isinstance(parts[3], ObjectId))
+    ) and all(isinstance(part, datetime) for part in parts[1:3])
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return tuple(parts)
+
+async def _query_changes(
+    db: AsyncIOMotorDatabase, owner_id: ObjectId, since: Optional[str], limit: int
+) -> Tuple[List[dict], str, bool]:
+    """Changed note documents (tombstones included), the next sync token and whether the sync is complete."""
+    now = _utcnow()
+    lookback_point = now - timedelta(seconds=settings.NOTES_SYNC_LOOKBACK_SECONDS)
+    query = {"owner_id": owner_id}
+    
+    if since is None:
+        safe_point = lookback_point
+    else:
+        token = _parse_sync_token(since)
+        safe_point = token[1]
+        if safe_point < now - timedelta(seconds=settings.NOTES_TOMBSTONE_TTL_SECONDS):
+            raise HTTPException(status_code=410, detail="Sync token expired")
+        if token[0] == "p":
+            # Next page of a sync in progress
+            last_updated_at, last_id = token[2], token[3]
+            query["$or"] = [
+                {"updated_at": {"$gt": last_updated_at}},
+                {"updated_at": last_updated_at, "_id": {"$gt": last_id}},
+            ]
+        else:
+            query["updated_at"] = {"$gte": safe_point}
+            # Writes older than the lookback are committed by now and were
+            # all at or after the old safe point, so this sync will see them
+            safe_point = max(safe_point, lookback_point)
+    
+    docs = await (
+        db["notes"]
+        .find(query, {**NOTE_PROJECTION, "deleted": 1, "deleted_at": 1})
+        .sort(CHANGES_SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    complete = len(docs) <= limit
+    docs = docs[:limit]
+    return docs, _sync_token(safe_point, None if complete else docs[-1]), complete
+
+@router.get("/changes", response_model=NoteChanges)
+async def get_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Notes created, updated or deleted since a sync token.
+    
+    Without ``since`` every note is returned. Keep calling with the returned
+    ``sync_token`` while ``complete`` is false. Tokens only move forward.
+    Because writers on other servers may commit late, a new sync re-reads
+    the last NOTES_SYNC_LOOKBACK_SECONDS, so a change can be delivered
+    twice; apply changes by id. Tokens older than the tombstone TTL are
+    rejected with 410: deletions may have been missed, fetch everything again.
+    """
+    docs, sync_token, complete = await _query_changes(db, owner_id, since, limit)
+    return NoteChanges(
+        notes=[Note(**doc) for doc in docs if not doc.get("deleted")],
+        deleted=[
+            NoteTombstone(id=str(doc["_id"]), deleted_at=doc["deleted_at"])
+            for doc in docs if doc.get("deleted")
+        ],
+        sync_token=sync_token,
+        complete=complete,
+    )
+
+# Comment line sent on idle streams so proxies keep the connection open
+SSE_KEEPALIVE_SECONDS = 15
+
+def _sse_event(doc: dict, event_id: Optional[str] = None) -> bytes:
+    if doc.get("deleted"):
+        event = "delete"
+        data = json.dumps({"_id": str(doc["_id"]), "deleted_at": doc["deleted_at"].isoformat()})
+    else:
+        event = "note"
+        data = _note_json(doc)
+    id_line = f"id: {event_id}\n" if event_id else ""
+    return f"event: {event}\n{id_line}data: {data}\n\n".encode()
+
+async def _note_events(
+    db: AsyncIOMotorDatabase, owner_id: ObjectId, since: Optional[str]
+) -> AsyncIterator[bytes]:
+    """Catch up from ``since`` like /changes, then forward live changes."""
+    # Subscribe before catching up so nothing written meanwhile is missed
+    subscription = note_changes.subscribe(owner_id)
+    try:
+        yield b"retry: 3000\n\n"
+        token, complete = since, False
+        while not complete:
+            docs, token, complete = await _query_changes(db, owner_id, token, limit=500)
+            for i, doc in enumerate(docs):
+                yield _sse_event(doc, token if i == len(docs) - 1 else None)
+        yield f"event: ready\nid: {token}\ndata: {{}}\n\n".encode()
+        
+        lookback = timedelta(seconds=settings.NOTES_SYNC_LOOKBACK_SECONDS)
+        safe_point = _parse_sync_token(token)[1]
+        while True:
+            try:
+                doc = await asyncio.wait_for(subscription.queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if subscription.overflowed.is_set():
+                # Events were dropped; the client reconnects with Last-Event-ID
+                return
+            # Same reasoning as /changes: older changes have all been seen
+            safe_point = max(safe_point, doc["updated_at"] - lookback)
+            yield _sse_event(doc, _sync_token(safe_point))
+    finally:
+        note_changes.unsubscribe(subscription)
+
+@router.get("/stream")
+async def stream_notes(
+    request: Request,
+    since: Optional[str] = None,
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Server-sent events with the current user's note changes.
+    
+    ``note`` events carry a note, ``delete`` events a tombstone. Event ids
+    are sync tokens (see /changes): on reconnect the browser sends the last
+    one as Last-Event-ID and the stream catches up from there before going
+    live. Without a token the stream starts with every note.
+    """
+    since = request.headers.get("last-event-id") or since
+    if since is not None:
+        # Fail with a proper status before the stream starts
+        _parse_sync_token(since)
+    return StreamingResponse(
+        _note_events(db, owner_id, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+class _ImportReport:
+    """Import counters; keeps at most NOTES_IMPORT_MAX_ERRORS error details."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[NoteImportError] = []
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.NOTES_IMPORT_MAX_ERRORS:
+            self.errors.append(NoteImportError(line=line, error=error))
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'note'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+async def _insert_batch(
+    db: AsyncIOMotorDatabase, batch: List[Tuple[int, dict]], report: _ImportReport
+) -> None:
+    """Unordered insert of (line, document) pairs; failures are reported per line."""
+    try:
+        await db["notes"].insert_many([doc for _, doc in batch], ordered=False)
+        report.inserted += len(batch)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        report.inserted += e.details.get("nInserted", len(batch) - len(write_errors))
+        for write_error in write_errors:
+            report.fail(batch[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+
+@router.post("/import", response_model=NoteImportResult)
+async def import_notes(
+    request: Request,
+    owner_id: ObjectId = Depends(get_current_user_id),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+):
+    """
+    Create notes from a newline-delimited JSON body, one NoteCreate per line.
+    
+    The body is read as it arrives (gzip with Content-Encoding: gzip) and
+    inserted in batches of NOTES_IMPORT_BATCH_SIZE; the next part of the
+    body is only read once the previous batch is written. Invalid lines
+    are reported by line number and do not stop the import. A truncated or
+    corrupt gzip body is answered with 400; batches written before that are
+    kept.
+    """
+    encoding = request.headers.get("content-encoding", "identity").lower()
+    if encoding not in ("identity", "gzip"):
+        raise HTTPException(status_code=415, detail="Unsupported Content-Encoding")
+    
+    report = _ImportReport()
+    batch: List[Tuple[int, dict]] = []
+    lines = iter_lines(
+        request.stream(), settings.NOTES_IMPORT_MAX_LINE_BYTES, gzip=encoding == "gzip"
+    )
+    try:
+        async for line_number, line in lines:
+            if line is None:
+                report.fail(line_number, f"Line longer than {settings.NOTES_IMPORT_MAX_LINE_BYTES} bytes")
+                continue
+            try:
+                note = NoteCreate.model_validate_json(line)
+            except ValidationError as e:
+                report.fail(line_number, _validation_message(e))
+                continue
+            now = _utcnow()
+            note_in_db = NoteInDB(
+                **note.model_dump(),
+                owner_id=owner_id,
+                created_at=now,
+                updated_at=now
+            )
+            batch.append((line_number, with_title_norm(note_in_db.model_dump(by_alias=True))))
+            if len(batch) >= settings.NOTES_IMPORT_BATCH_SIZE:
+                await _insert_batch(db, batch, report)
+                batch = []
+    except zlib.error:
+        # Batches already written stay; the rest of the body is unreadable
+        logger.warning(f"Corrupt gzip import for {owner_id} after {report.inserted} notes")
+        raise HTTPException(status_code=400, detail="Body is not valid gzip")
+    except EOFError:
+        # Batches already written stay; the rest of the body is lost
+        logger.warning(f"Truncated gzip import for {owner_id} after {report.inserted} notes")
+        raise HTTPException(status_code=400, detail="truncated gzip body")
+    if batch:
+        await _insert_batch(db, batch, report)
+    
+    logger.info(f"Imported {report.inserted} notes for {owner_id}, {report.failed} lines failed")
+    return NoteImportResult(inserted=report.inserted, failed=report.failed, errors=report.errors)
+
+@router.post("/batch", response_model=NoteBatchResponse)
+async def batch_notes(
+    batch: NoteBatchRequest,
+    owner_id: ObjectId = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongo_db)
 ):
     """
-    Get list of notes for the current user with pagination.
+    Apply a list of create, update and delete operations in order.
+    
+    The caller is authenticated once, ownership of every referenced note is
+    checked with one query, and all valid operations are sent as a single
+    ordered bulk_write. Each operation gets its own result; an invalid
+    operation does not stop the others. A note deleted by another request
+    in the meantime is reported as 404, not as updated.
     """
-    notes = await db["notes"].find(
-        {"owner_id": current_user.id}
-    ).skip(skip).limit(limit).to_list(length=limit)
-    return [Note(**note) for note in notes]
+    operations = batch.operations
+    if len(operations) > settings.NOTES_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.NOTES_BATCH_MAX_OPERATIONS} operations per batch"
+        )
+    
+    results = [NoteBatchResult(index=i, status=200) for i in range(len(operations))]
+    
+    # One ownership query for every note the batch refers to
+    referenced = {ObjectId(op.id) for op in operations if op.op != "create" and op.id and ObjectId.is_valid(op.id)}
+    existing = set()
+    if referenced:
+        query = {"_id": {"$in": list(referenced)}, "owner_id": owner_id, **NOT_DELETED}
+        async for doc in db["notes"].find(query, {"_id": 1}):
+            existing.add(doc["_id"])
+    
+    now = _utcnow()
+    requests = []
+    request_indexes = []  # bulk_write position -> operation index
+    request_note_ids = []  # bulk_write position -> note of an update or delete, None for creates
+    for i, op in enumerate(operations):
+        result = results[i]
+        if op.op == "create":
+            if op.title is None or op.content is None:
+                result.status, result.error = 400, "title and content are required"
+                continue
+            note_in_db = NoteInDB(
+                title=op.title,
+                content=op.content,
+                owner_id=owner_id,
+                created_at=now,
+                updated_at=now
+            )
+            requests.append(InsertOne(with_title_norm(note_in_db.model_dump(by_alias=True))))
+            request_note_ids.append(None)
+            result.status, result.id, result.updated_at = 201, str(note_in_db.id), now
+            existing.add(note_in_db.id)
+        else:
+            if not op.id or not ObjectId.is_valid(op.id):
+                result.status, result.error = 400, "Invalid note ID format"
+                continue
+            object_id = ObjectId(op.id)
+            result.id = op.id
+            # Earlier operations of the same batch count (e.g. update after delete)
+            if object_id not in existing:
+                result.status, result.error = 404, "Note not found"
+                continue
+            if op.op == "update":
+                update_data = {
+                    field: value for field, value in (("title", op.title), ("content", op.content))
+                    if value is not None
+                }
+                update_data["updated_at"] = now
+                requests.append(UpdateOne(
+                    {"_id": object_id, "owner_id": owner_id, **NOT_DELETED},
+                    {"$set": with_title_norm(update_data)}
+                ))
+                result.updated_at = now
+            else:
+                requests.append(UpdateOne({"_id": object_id, "owner_id": owner_id, **NOT_DELETED}, _tombstone_update(now)))
+                existing.discard(object_id)
+            request_note_ids.append(object_id)
+        request_indexes.append(i)
+    
+    if requests:
+        executed = len(requests)
+        try:
+            bulk_result = await db["notes"].bulk_write(requests, ordered=True)
+            matched = bulk_result.matched_count
+        except BulkWriteError as e:
+            # An ordered bulk write stops at the first error
+            write_errors = e.details.get("writeErrors", [])
+            failed_at = write_errors[0]["index"] if write_errors else 0
+            executed, matched = failed_at, e.details.get("nMatched", 0)
+            for position, i in enumerate(request_indexes[failed_at:], start=failed_at):
+                result = results[i]
+                if result.status == 201:
+                    result.id = None
+                result.status, result.updated_at = 500, None
+                result.error = write_errors[0].get("errmsg", "Write failed") if position == failed_at else "Not executed"
+        
+        updated = [(request_indexes[position], request_note_ids[position])
+                   for position in range(executed) if request_note_ids[position] is not None]
+        if matched < len(updated):
+            # Some notes were deleted after the ownership query. The result
+            # only has totals, so find the notes this batch did write: they
+            # carry its timestamp (a tombstone too).
+            written = set()
+            query = {"_id": {"$in": list({note_id for _, note_id in updated})}, "owner_id": owner_id, "updated_at": now}
+            async for doc in db["notes"].find(query, {"_id": 1}):
+                written.add(doc["_id"])
+            for i, note_id in updated:
+                if note_id not in written:
+                    result = results[i]
+                    result.status, result.error, result.updated_at = 404, "Note not found", None
+    
+    return NoteBatchResponse(results=results)
 
 @router.post("/", response_model=Note, status_code=status.HTTP_201_CREATED)
 async def create_note(
     note: NoteCreate,
-    current_user: UserInDB = Depends(get_current_user),
+    response: Response,
+    owner_id: ObjectId = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongo_db)
 ):
     """
     Create a new note for the current user.
     """
+    now = _utcnow()
     note_in_db = NoteInDB(
         **note.model_dump(),
-        owner_id=current_user.id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        owner_id=owner_id,
+        created_at=now,
+        updated_at=now
     )
     
-    result = await db["notes"].insert_one(note_in_db.model_dump(by_alias=True))
-    created_note = await db["notes"].find_one({"_id": result.inserted_id})
-    
-    if created_note is None:
-        raise HTTPException(status_code=500, detail="Failed to create note")
-    
-    return Note(**created_note)
+    # The inserted document is exactly what we built, so echo it back
+    # instead of reading it again
+    document = with_title_norm(note_in_db.model_dump(by_alias=True))
+    await db["notes"].insert_one(document)
+    response.headers.update(_note_validators(document))
+    return Note(**document)
 
 @router.get("/{note_id}", response_model=Note)
 async def get_note(
     note_id: str,
-    current_user: UserInDB = Depends(get_current_user),
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    if_modified_since: Annotated[Optional[str], Header()] = None,
+    owner_id: ObjectId = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongo_db)
 ):
     """
     Get a specific note by ID.
-    Only accessible by the note owner.
+    Only accessible by the note owner. Answers 304 when If-None-Match (or
+    If-Modified-Since) shows the client already has this version.
     """
-    try:
-        note = await db["notes"].find_one({
-            "_id": ObjectId(note_id),
-            "owner_id": current_user.id
-        })
-        if note is None:
-            raise HTTPException(status_code=404, detail="Note not found")
-        return Note(**note)
-    except Exception as e:
-        logger.error(f"Error retrieving note {note_id}: {e}")
-        raise HTTPException(status_code=400, detail="Invalid note ID format")
+    note = await db["notes"].find_one(
+        {"_id": _parse_note_id(note_id), "owner_id": owner_id, **NOT_DELETED},
+        NOTE_PROJECTION
+    )
+    if note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    headers = _note_validators(note)
+    if not_modified(if_none_match, if_modified_since, headers["ETag"], note["updated_at"]):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(_encode_note(note), headers=headers)
 
 @router.put("/{note_id}", response_model=Note)
 async def update_note(
     note_id: str,
     note_update: NoteUpdate,
-    current_user: UserInDB = Depends(get_current_user),
+    response: Response,
+    if_match: Annotated[Optional[str], Header()] = None,
+    owner_id: ObjectId = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongo_db)
 ):
     """
     Update a note.
-    Only accessible by the note owner.
+    Only accessible by the note owner. With If-Match set to the note's
+    ETag, the update only happens if nobody changed the note since; it
+    fails with 412 otherwise. With any If-Match (``*`` too) a missing note
+    is also a 412, as RFC 9110 requires for a failed precondition.
     """
-    try:
-        # Check if note exists and belongs to user
-        existing_note = await db["notes"].find_one({
-            "_id": ObjectId(note_id),
-            "owner_id": current_user.id
-        })
-        if existing_note is None:
-            raise HTTPException(status_code=404, detail="Note not found")
-        
-        # Update note
-        update_data = note_update.model_dump(exclude_unset=True)
-        update_data["updated_at"] = datetime.utcnow()
-        
-        result = await db["notes"].update_one(
-            {"_id": ObjectId(note_id)},
-            {"$set": update_data}
+    object_id = _parse_note_id(note_id)
+    query = {"_id": object_id, "owner_id": owner_id, **NOT_DELETED}
+    condition = {} if if_match is None else _if_match_filter(if_match, object_id)
+    
+    update_data = note_update.model_dump(exclude_unset=True)
+    update_data["updated_at"] = _utcnow()
+    
+    # Ownership check, version check, update and read-back in a single round trip
+    updated_note = None
+    if condition is not None:
+        updated_note = await db["notes"].find_one_and_update(
+            {**query, **condition},
+            {"$set": with_title_norm(update_data)},
+            return_document=ReturnDocument.AFTER
         )
-        
-        if result.modified_count == 0:
-            raise HTTPException(status_code=500, detail="Failed to update note")
-        
-        updated_note = await db["notes"].find_one({"_id": ObjectId(note_id)})
-        return Note(**updated_note)
-    except Exception as e:
-        logger.error(f"Error updating note {note_id}: {e}")
-        raise HTTPException(status_code=400, detail="Invalid note ID format")
+    if updated_note is None:
+        if if_match is not None:
+            raise HTTPException(status_code=412, detail="Note was modified by someone else or does not exist")
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    response.headers.update(_note_validators(updated_note))
+    return Note(**updated_note)
 
 @router.delete("/{note_id}")
 async def delete_note(
     note_id: str,
-    current_user: UserInDB = Depends(get_current_user),
+    owner_id: ObjectId = Depends(get_current_user_id),
     db: AsyncIOMotorDatabase = Depends(get_mongo_db)
 ):
     """
     Delete a note.
-    Only accessible by the note owner.
+    Only accessible by the note owner. The note is kept as a tombstone so
+    that sync clients learn about the deletion from /changes.
     """
-    try:
-        result = await db["notes"].delete_one({
-            "_id": ObjectId(note_id),
-            "owner_id": current_user.id
-        })
-        
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Note not found")
-        
-        return {"message": "Note deleted successfully"}
-    except Exception as e:
-        logger.error(f"Error deleting note {note_id}: {e}")
-        raise HTTPException(status_code=400, detail="Invalid note ID format") 
\ No newline at end of file
+    object_id = _parse_note_id(note_id)
+    result = await db["notes"].update_one(
+        {"_id": object_id, "owner_id": owner_id, **NOT_DELETED},
+        _tombstone_update(_utcnow())
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    return {"message": "Note deleted successfully"}
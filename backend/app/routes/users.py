@@ -5,12 +5,16 @@ from typing import List
 
 from app.database import get_mongo_db
 from app.models.user import User, UserInDB
+from app.responses import FastJSONResponse, document_encoder
 from app.schemas.user import UserOut
-from app.security import get_current_user, get_password_hash
+from app.security import get_current_user, get_password_hash, invalidate_cached_user, revoke_user_tokens
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# User documents straight to UserOut JSON, see app.responses
+_encode_user = document_encoder(UserOut)
+
 @router.get("/", response_model=List[UserOut])
 async def get_users(
     skip: int = 0,
@@ -22,8 +26,8 @@ async def get_users(
     Get list of users with pagination.
     Only accessible by authenticated users.
     """
-    users = await db["users"].find().skip(skip).limit(limit).to_list(length=limit)
-    return [UserOut(**user) for user in users]
+    users = await db["users"].find({}, {"email": 1}).skip(skip).limit(limit).to_list(length=limit)
+    return FastJSONResponse([_encode_user(user) for user in users])
 
 @router.get("/{user_id}", response_model=UserOut)
 async def get_user(
@@ -37,10 +41,10 @@ async def get_user(
     """
     from bson import ObjectId
     try:
-        user = await db["users"].find_one({"_id": ObjectId(user_id)})
+        user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"email": 1})
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
-        return UserOut(**user)
+        return FastJSONResponse(_encode_user(user))
     except Exception as e:
         logger.error(f"Error retrieving user {user_id}: {e}")
         raise HTTPException(status_code=400, detail="Invalid user ID format")
@@ -75,6 +79,13 @@ async def update_user_me(
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # Cached entries are keyed by email, which may just have changed
+    invalidate_cached_user(current_user.email)
+    if "email" in update_data and update_data["email"] != current_user.email:
+        invalidate_cached_user(update_data["email"])
+        # Issued tokens carry the old email as subject
+        await revoke_user_tokens(db, current_user)
+    
     updated_user = await db["users"].find_one({"_id": current_user.id})
     return UserOut(**updated_user)
 
@@ -92,6 +103,7 @@ async def delete_user_me(
     
     # Delete user
     result = await db["users"].delete_one({"_id": current_user.id})
+    invalidate_cached_user(current_user.email, current_user.id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
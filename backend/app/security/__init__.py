@@ -3,15 +3,32 @@ from .security import (
     verify_password, 
     create_access_token, 
     get_current_user,
+    get_current_user_id,
+    revoke_user_tokens,
     oauth2_scheme,
     pwd_context
 )
+from .hashing import (
+    verify_password_async,
+    get_password_hash_async,
+    password_executor,
+    shutdown_password_executor
+)
+from .cache import user_cache, invalidate_cached_user
 
 __all__ = [
     "get_password_hash", 
     "verify_password", 
     "create_access_token", 
     "get_current_user",
+    "get_current_user_id",
+    "revoke_user_tokens",
     "oauth2_scheme",
-    "pwd_context"
+    "pwd_context",
+    "verify_password_async",
+    "get_password_hash_async",
+    "password_executor",
+    "shutdown_password_executor",
+    "user_cache",
+    "invalidate_cached_user"
 ] 
\ No newline at end of file
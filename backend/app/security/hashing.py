@@ -0,0 +1,104 @@
+"""
+Bounded executor for bcrypt work.
+
+bcrypt (12 rounds) takes ~250ms of CPU per call. Running it inside an async
+handler blocks the event loop for every other request on the worker, so all
+hashing and verification goes through a small thread pool instead. bcrypt
+releases the GIL while hashing, so threads give real parallelism here.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from .security import pwd_context
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHashExecutor:
+    """
+    Thread pool with a bounded backlog.
+
+    At most ``max_workers`` hashes run at once and at most ``max_queue`` more
+    wait for a worker. Anything beyond that is rejected immediately with a 503
+    so a login burst cannot build an unbounded queue of CPU work.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int = 1):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = self.max_workers + max(0, max_queue)
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    def _release(self, _future) -> None:
+        self.pending -= 1
+
+    def _release_from_worker(self, loop: asyncio.AbstractEventLoop, future) -> None:
+        # Runs on the worker thread. At shutdown the loop may already be
+        # closed; nothing else uses the counter then, so release directly.
+        if not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._release, future)
+                return
+            except RuntimeError:
+                pass
+        self._release(future)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Run ``func(*args)`` on the pool, or fail fast if the backlog is full."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Password hashing queue is full, rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(func, *args)
+        self.pending += 1
+        # Release the slot when the work actually finishes, not when the caller
+        # stops waiting, so cancelled requests cannot overcommit the pool.
+        future.add_done_callback(lambda f: self._release_from_worker(loop, f))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_executor = PasswordHashExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_executor.run(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_executor.run(pwd_context.hash, password)
+
+
+def shutdown_password_executor() -> None:
+    password_executor.shutdown()
@@ -8,6 +8,8 @@ from app.config import settings
 from app.models.user import UserInDB
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.database import get_mongo_db
+from bson import ObjectId
+from .cache import user_cache, token_version_cache
 
 # Remove SECRET_KEY from __all__ for security
 __all__ = [
@@ -17,6 +19,8 @@ __all__ = [
     'get_password_hash',
     'create_access_token',
     'get_current_user',
+    'get_current_user_id',
+    'revoke_user_tokens',
 ]
 
 # Enhanced password context with explicit settings
@@ -55,32 +59,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         algorithm=settings.JWT_ALGORITHM
     )
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
-) -> UserInDB:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_token(token: str) -> dict:
     try:
         # Explicit verification of token expiration and claims
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM],
-            audience=["noteapp-client"],
+            audience="noteapp-client",
             issuer="noteapp-api"
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        
-        # Query MongoDB instead of SQLAlchemy
-        user_data = await db["users"].find_one({"email": username})
-        
     except JWTError as e:
         # More specific error handling
         if "expired" in str(e):
@@ -89,17 +84,92 @@ async def get_current_user(
                 detail="Token has expired",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        raise credentials_exception
+        raise _credentials_exception()
+
+async def _get_token_version(db: AsyncIOMotorDatabase, user_id: ObjectId) -> Optional[int]:
+    """Current token version of a user, or None if the user no longer exists."""
+    key = str(user_id)
+    version = token_version_cache.get(key)
+    if version is not None:
+        return version
     
+    user_data = await db["users"].find_one({"_id": user_id}, {"token_version": 1})
     if user_data is None:
-        # Generic error to prevent user enumeration
+        return None
+    version = user_data.get("token_version", 0)
+    token_version_cache.set(key, version)
+    return version
+
+async def revoke_user_tokens(db: AsyncIOMotorDatabase, user: UserInDB) -> None:
+    """Invalidate every token issued to ``user`` by bumping its token version."""
+    await db["users"].update_one({"_id": user.id}, {"$inc": {"token_version": 1}})
+    token_version_cache.invalidate(str(user.id))
+    user_cache.invalidate(user.email)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+) -> UserInDB:
+    credentials_exception = _credentials_exception()
+    
+    payload = _decode_token(token)
+    username: str = payload.get("sub")
+    if username is None:
         raise credentials_exception
     
-    # Validate user data with Pydantic model
-    try:
-        user = UserInDB(**user_data)
-    except Exception:
-        # Handle potential validation errors if DB data doesn't match model
-        raise credentials_exception 
+    # Serve recently validated users from the in-process cache
+    user = user_cache.get(username)
+    if user is None:
+        # Query MongoDB instead of SQLAlchemy
+        user_data = await db["users"].find_one({"email": username})
+        if user_data is None:
+            # Generic error to prevent user enumeration
+            raise credentials_exception
+        
+        # Validate user data with Pydantic model
+        try:
+            user = UserInDB(**user_data)
+        except Exception:
+            # Handle potential validation errors if DB data doesn't match model
+            raise credentials_exception
         
-    return user 
\ No newline at end of file
+        user_cache.set(username, user)
+    
+    # Tokens issued before the last revocation carry an older version
+    if "ver" in payload and payload["ver"] != user.token_version:
+        raise credentials_exception
+    
+    # The id must belong to the same account as the email, e.g. not to a
+    # user who was deleted and whose email was registered again
+    if "uid" in payload and payload["uid"] != str(user.id):
+        raise credentials_exception
+    
+    return user
+
+async def get_current_user_id(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_mongo_db)
+) -> ObjectId:
+    """
+    Lightweight dependency for routes that only need the caller's id.
+    Reads the id from the token and only checks the (cached) token version,
+    so note routes do not have to load the user document.
+    """
+    credentials_exception = _credentials_exception()
+    
+    payload = _decode_token(token)
+    uid = payload.get("uid")
+    if uid is None:
+        # Tokens issued before ids were embedded: fall back to the full lookup
+        user = await get_current_user(token, db)
+        return user.id
+    
+    if not ObjectId.is_valid(uid):
+        raise credentials_exception
+    user_id = ObjectId(uid)
+    
+    version = await _get_token_version(db, user_id)
+    if version is None or payload.get("ver", 0) != version:
+        raise credentials_exception
+    
+    return user_id
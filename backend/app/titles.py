@@ -0,0 +1,106 @@
+"""
+Normalized note titles for prefix search (GET /api/notes/suggest).
+
+Every note stores ``title_norm`` next to its title: case-folded, without
+accents and with runs of whitespace collapsed, so that "Đi chợ" is found by
+typing "di ch". The ``(owner_id, title_norm)`` index turns a prefix lookup
+into a short index range scan.
+"""
+import logging
+import unicodedata
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Marker document in the "migrations" collection; one worker runs the backfill
+BACKFILL_MIGRATION_ID = "title_norm_backfill"
+# A claim older than this is taken over (its worker died before finishing)
+BACKFILL_LEASE = timedelta(minutes=10)
+
+# Letters with no decomposition into base letter + accent
+_EXTRA_FOLDS = str.maketrans({"đ": "d", "ø": "o", "ł": "l", "ı": "i"})
+
+
+def normalize_title(title: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", title).casefold()
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.translate(_EXTRA_FOLDS).split())
+
+
+def normalize_prefix(prefix: str) -> str:
+    """
+    ``normalize_title`` for a typed prefix. Trailing whitespace is kept as one
+    space: "di " is a complete word and must not match "diary".
+    """
+    normalized = normalize_title(prefix)
+    if normalized and prefix[-1].isspace():
+        normalized += " "
+    return normalized
+
+
+def with_title_norm(fields: dict) -> dict:
+    """Add title_norm to a note document or $set update that sets the title."""
+    if fields.get("title") is not None:
+        fields["title_norm"] = normalize_title(fields["title"])
+    return fields
+
+
+async def backfill_title_norm(db: AsyncIOMotorDatabase) -> int:
+    """Set title_norm on notes written before it existed. Returns the number updated."""
+    collection = db["notes"]
+    updated = 0
+    while True:
+        docs = await collection.find(
+            {"title_norm": {"$exists": False}, "title": {"$type": "string"}}, {"title": 1}
+        ).limit(BACKFILL_BATCH_SIZE).to_list(length=BACKFILL_BATCH_SIZE)
+        if not docs:
+            break
+        # Matching on the title too leaves notes renamed meanwhile to the write path
+        result = await collection.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"], "title": doc["title"], "title_norm": {"$exists": False}},
+                {"$set": {"title_norm": normalize_title(doc["title"])}},
+            )
+            for doc in docs
+        ], ordered=False)
+        if result.modified_count == 0:
+            break
+        updated += result.modified_count
+    if updated:
+        logger.info(f"Backfilled title_norm on {updated} notes")
+    return updated
+
+
+async def backfill_title_norm_once(db: AsyncIOMotorDatabase) -> int:
+    """
+    Run ``backfill_title_norm`` on one worker only and record it as done.
+
+    Workers race for the marker document; the upsert of the loser fails
+    with a duplicate key, as it does once the backfill is complete.
+    """
+    migrations = db["migrations"]
+    now = datetime.utcnow()
+    try:
+        await migrations.update_one(
+            {
+                "_id": BACKFILL_MIGRATION_ID,
+                "completed_at": {"$exists": False},
+                "claimed_at": {"$lt": now - BACKFILL_LEASE},
+            },
+            {"$set": {"claimed_at": now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return 0
+    updated = await backfill_title_norm(db)
+    await migrations.update_one(
+        {"_id": BACKFILL_MIGRATION_ID},
+        {"$set": {"completed_at": datetime.utcnow(), "updated": updated}},
+    )
+    return updated
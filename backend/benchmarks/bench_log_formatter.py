@@ -0,0 +1,100 @@
+"""
+SecurityJsonFormatter throughput (records/sec) on typical request and auth
+log lines, with masking enabled as in production, against the previous
+implementation.
+
+Run from the backend directory:
+    python -m benchmarks.bench_log_formatter
+"""
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_bench")
+
+from pythonjsonlogger import jsonlogger
+
+from app.config import settings
+from app.logging_config import SecurityJsonFormatter
+
+FMT = "%(timestamp)s %(levelname)s %(name)s %(funcName)s %(filename)s %(lineno)d %(message)s"
+RECORDS = 50_000
+ROUNDS = 5
+
+
+class PreviousSecurityJsonFormatter(jsonlogger.JsonFormatter):
+    """The formatter as it was, with the production masking branch always on."""
+    def add_fields(self, log_record, record, message_dict):
+        super().add_fields(log_record, record, message_dict)
+        log_record['timestamp'] = datetime.utcnow().isoformat()
+        log_record['environment'] = settings.ENVIRONMENT
+        log_record['app_version'] = settings.VERSION
+        if 'password' in str(message_dict):
+            log_record['message'] = self.mask_sensitive_data(log_record['message'])
+
+    @staticmethod
+    def mask_sensitive_data(message: str) -> str:
+        for field in ['password', 'token', 'secret', 'key', 'auth']:
+            message = re.sub(fr'{field}[=:]\s*\S+', f'{field}=*****', message, flags=re.IGNORECASE)
+        return message
+
+
+def _record(msg, extra=None, level=logging.INFO) -> logging.LogRecord:
+    record = logging.LogRecord("app.routes.auth", level, "auth.py", 90, msg, None, None, func="login")
+    for key, value in (extra or {}).items():
+        setattr(record, key, value)
+    return record
+
+
+def sample_records():
+    request = {"request_id": "0b6f1c9e-5a0e-4a57-9d6a-2f3a4f1e8c11", "method": "GET",
+               "url": "http://api.example.com/api/notes?limit=20", "client_host": "10.0.3.17"}
+    return [
+        _record("Request started", {**request, "status_code": None, "response_time": None}),
+        _record("Request completed", {**request, "status_code": 200, "response_time": "0.012s"}),
+        _record("User authenticated successfully: alice@example.com"),
+        _record("Failed login attempt for user: mallory@example.com", level=logging.WARNING),
+        _record({"event": "password_reset", "user": "bob@example.com", "password": "hunter2"}),
+        _record("Issued refresh token=eyJhbGciOiJIUzI1NiJ9.e30.abc for bob@example.com"),
+    ]
+
+
+def measure(formatter: logging.Formatter) -> float:
+    """Best of ROUNDS, in records/sec."""
+    records = sample_records()
+    best = 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for i in range(RECORDS):
+            formatter.format(records[i % len(records)])
+        best = max(best, RECORDS / (time.perf_counter() - start))
+    return best
+
+
+def main() -> None:
+    # The previous formatter only ever masked dict messages, so most lines
+    # here skip masking there; the current one checks every message and extra
+    previous = measure(PreviousSecurityJsonFormatter(fmt=FMT))
+    current = measure(SecurityJsonFormatter(fmt=FMT, mask_sensitive=True))
+    unmasked = measure(SecurityJsonFormatter(fmt=FMT, mask_sensitive=False))
+    print(f"previous formatter:       {previous:9,.0f} records/s")
+    print(f"current formatter:        {current:9,.0f} records/s ({current / previous:.2f}x)")
+    print(f"current, masking off:     {unmasked:9,.0f} records/s")
+
+    # Masking alone, on every message
+    messages = [record.getMessage() for record in sample_records()]
+    for name, mask in (("previous", PreviousSecurityJsonFormatter.mask_sensitive_data),
+                       ("current", SecurityJsonFormatter.mask_sensitive_data)):
+        start = time.perf_counter()
+        for i in range(RECORDS):
+            mask(messages[i % len(messages)])
+        ns = (time.perf_counter() - start) / RECORDS * 1e9
+        print(f"{name + ' mask_sensitive_data:':26s}{ns:9,.0f} ns/message")
+
+
+if __name__ == "__main__":
+    main()
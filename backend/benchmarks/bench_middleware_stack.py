@@ -0,0 +1,116 @@
+"""
+Requests/sec of GET /api/health through the full middleware stack, with the
+pure ASGI middleware versus the previous BaseHTTPMiddleware implementations.
+
+Both apps share the same routes and middleware order; only the security
+header, rate limit and process time layers differ. No MongoDB is needed.
+
+Run from the backend directory:
+    python -m benchmarks.bench_middleware_stack
+"""
+import asyncio
+import logging
+import os
+import time
+
+# Keep the rate limiter out of the way; MongoDB is never contacted
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000000")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_bench")
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+from app.main import app
+from app.middleware.security import RateLimitMiddleware, SecurityHeadersMiddleware
+from app.middleware.timing import ProcessTimeMiddleware
+
+# httpx logs every request at INFO, which would dominate the measurement
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+REQUESTS = 5_000
+CONCURRENCY = 16
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next) -> Response:
+        response = await call_next(request)
+        if settings.SECURITY_HEADERS:
+            if settings.is_production():
+                response.headers["Strict-Transport-Security"] = f"max-age={settings.HSTS_SECONDS}; includeSubDomains"
+            if settings.FRAME_DENY:
+                response.headers["X-Frame-Options"] = "DENY"
+            if settings.XSS_PROTECTION:
+                response.headers["X-XSS-Protection"] = "1; mode=block"
+            if settings.CONTENT_TYPE_NOSNIFF:
+                response.headers["X-Content-Type-Options"] = "nosniff"
+            response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
+            response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, limiter):
+        super().__init__(app)
+        self.limiter = limiter
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        client_ip = request.client.host if request.client else "unknown"
+        if not await self.limiter.hit(client_ip):
+            return Response(content="Rate limit exceeded", status_code=429)
+        return await call_next(request)
+
+
+async def legacy_process_time(request: Request, call_next):
+    start_time = time.time()
+    response = await call_next(request)
+    response.headers["X-Process-Time"] = str(time.time() - start_time)
+    return response
+
+
+def build_legacy_app() -> FastAPI:
+    """Copy of ``app.main.app`` with the old middleware classes swapped in."""
+    legacy = FastAPI()
+    legacy.router.routes = app.router.routes
+    legacy.state.rate_limiter = app.state.rate_limiter
+    for middleware in app.user_middleware:
+        if middleware.cls is SecurityHeadersMiddleware:
+            middleware = Middleware(LegacySecurityHeadersMiddleware)
+        elif middleware.cls is RateLimitMiddleware:
+            middleware = Middleware(LegacyRateLimitMiddleware, **middleware.kwargs)
+        elif middleware.cls is ProcessTimeMiddleware:
+            middleware = Middleware(BaseHTTPMiddleware, dispatch=legacy_process_time)
+        legacy.user_middleware.append(middleware)
+    return legacy
+
+
+async def measure(asgi_app) -> float:
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for _ in range(200):
+            await client.get("/api/health")
+
+        async def worker(count: int) -> None:
+            for _ in range(count):
+                response = await client.get("/api/health")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+    return (REQUESTS // CONCURRENCY) * CONCURRENCY / elapsed
+
+
+async def main() -> None:
+    legacy = await measure(build_legacy_app())
+    current = await measure(app)
+    print(f"BaseHTTPMiddleware stack: {legacy:8.0f} req/s")
+    print(f"pure ASGI stack:          {current:8.0f} req/s ({current / legacy:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
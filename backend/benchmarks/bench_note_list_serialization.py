@@ -0,0 +1,88 @@
+"""
+Latency of a note list response at 10, 100 and 1000 notes: response_model
+validation of Note instances versus FastJSONResponse from raw documents.
+
+Both routes answer from the same in-memory documents, so only building and
+serializing the response is measured. No MongoDB is needed. Run from the
+backend directory:
+    python -m benchmarks.bench_note_list_serialization
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_bench")
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.models.note import Note
+from app.responses import FastJSONResponse, orjson
+from app.routes.notes import _encode_note
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+SIZES = (10, 100, 1000)
+REPEAT = {10: 2000, 100: 500, 1000: 50}
+
+
+def make_docs(count: int) -> List[dict]:
+    owner_id = ObjectId()
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "owner_id": owner_id,
+            "title": f"Note {i}",
+            "content": "Lorem ipsum dolor sit amet, " * 10,
+            "created_at": start + timedelta(seconds=i, microseconds=123000),
+            "updated_at": start + timedelta(seconds=i, microseconds=456000),
+        }
+        for i in range(count)
+    ]
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    docs = {size: make_docs(size) for size in SIZES}
+
+    @app.get("/model/{size}", response_model=List[Note])
+    async def model_list(size: int):
+        return [Note(**doc) for doc in docs[size]]
+
+    @app.get("/fast/{size}", response_model=List[Note])
+    async def fast_list(size: int):
+        return FastJSONResponse([_encode_note(doc) for doc in docs[size]])
+
+    return app
+
+
+async def timed(client, path, repeat):
+    await client.get(path)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = await client.get(path)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return elapsed, response.json()
+
+
+async def main():
+    transport = httpx.ASGITransport(app=build_app())
+    print(f"encoder: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in SIZES:
+            model_ms, model_body = await timed(client, f"/model/{size}", REPEAT[size])
+            fast_ms, fast_body = await timed(client, f"/fast/{size}", REPEAT[size])
+            assert model_body == fast_body
+            print(f"{size:>5} notes   response_model {model_ms:7.3f} ms   "
+                  f"fast {fast_ms:7.3f} ms   {model_ms / fast_ms:4.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+GET /api/notes/export over 100k notes: throughput and memory.
+
+Needs a running MongoDB. Seeds a throwaway collection, then drains the same
+generator the endpoint streams, plain and gzip. Peak RSS is sampled after
+every chunk (Linux /proc), so it shows whether memory grows with the number
+of notes. Run from the backend directory:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.bench_notes_export
+"""
+import asyncio
+import os
+import resource
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_benchmark")
+
+from app.routes.notes import _export_chunks  # noqa: E402
+
+NOTES = 100_000
+SEED_BATCH = 5_000
+PAGE_SIZE = resource.getpagesize()
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / 1e6
+
+
+async def seed(db, owner_id):
+    collection = db["notes"]
+    await collection.drop()
+    await collection.create_indexes([
+        IndexModel([("owner_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)])
+    ])
+    start = datetime(2024, 1, 1)
+    for offset in range(0, NOTES, SEED_BATCH):
+        await collection.insert_many([
+            {
+                "owner_id": owner_id,
+                "title": f"Note {i}",
+                "content": "x" * 500,
+                "created_at": start + timedelta(seconds=i),
+                "updated_at": start + timedelta(seconds=i),
+            }
+            for i in range(offset, offset + SEED_BATCH)
+        ])
+
+
+async def drain(db, owner_id, compress: bool):
+    start_rss = peak_rss = rss_mb()
+    total = 0
+    start = time.perf_counter()
+    async for chunk in _export_chunks(db, owner_id, compress):
+        total += len(chunk)
+        peak_rss = max(peak_rss, rss_mb())
+    elapsed = time.perf_counter() - start
+    label = "gzip" if compress else "plain"
+    print(
+        f"{label:<6} {NOTES / elapsed:9,.0f} notes/s, {total / elapsed / 1e6:6.1f} MB/s out, "
+        f"{total / 1e6:6.1f} MB total, RSS {start_rss:6.1f} -> peak {peak_rss:6.1f} MB"
+    )
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ["MONGODB_URI"])
+    db = client[os.environ["MONGODB_DB_NAME"] + "_export"]
+    owner_id = ObjectId()
+    await seed(db, owner_id)
+
+    await drain(db, owner_id, compress=False)
+    await drain(db, owner_id, compress=True)
+
+    await client.drop_database(db.name)
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Page 1 vs page 1000 of GET /api/notes: skip/limit against keyset cursors.
+
+Needs a running MongoDB. Seeds a throwaway database, then times the same
+queries get_notes issues. Run from the backend directory:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.bench_notes_pagination
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_benchmark")
+
+from app.routes.notes import NOTES_SORT, _after_cursor  # noqa: E402
+
+PAGE_SIZE = 10
+PAGES = 1000
+NOTES = PAGE_SIZE * (PAGES + 1)
+REPEAT = 50
+
+
+async def seed(collection, owner_id):
+    await collection.drop()
+    await collection.create_indexes([
+        IndexModel([("owner_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)])
+    ])
+    start = datetime(2024, 1, 1)
+    docs = [
+        {
+            "_id": ObjectId(),
+            "owner_id": owner_id,
+            "title": f"Note {i}",
+            "content": "x" * 500,
+            "created_at": start + timedelta(seconds=i),
+            "updated_at": start + timedelta(seconds=i),
+        }
+        for i in range(NOTES)
+    ]
+    await collection.insert_many(docs)
+
+
+async def timed(label, make_cursor):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        await make_cursor().to_list(length=PAGE_SIZE)
+    elapsed = (time.perf_counter() - start) / REPEAT * 1000
+    print(f"{label:<28} {elapsed:7.2f} ms/page")
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ["MONGODB_URI"])
+    collection = client[os.environ["MONGODB_DB_NAME"]]["notes_pagination_bench"]
+    owner_id = ObjectId()
+    await seed(collection, owner_id)
+    query = {"owner_id": owner_id}
+
+    # Sort key of the last note on page 999, i.e. what page 1000's cursor holds
+    last = await collection.find(query).sort(NOTES_SORT).skip(PAGE_SIZE * PAGES - 1).limit(1).to_list(1)
+    deep_query = {**query, **_after_cursor(last[0]["updated_at"], last[0]["_id"])}
+
+    await timed("skip, page 1", lambda: collection.find(query).sort(NOTES_SORT).limit(PAGE_SIZE))
+    await timed(f"skip, page {PAGES}", lambda: collection.find(query).sort(NOTES_SORT).skip(PAGE_SIZE * PAGES).limit(PAGE_SIZE))
+    await timed("cursor, page 1", lambda: collection.find(query).sort(NOTES_SORT).limit(PAGE_SIZE))
+    await timed(f"cursor, page {PAGES}", lambda: collection.find(deep_query).sort(NOTES_SORT).limit(PAGE_SIZE))
+
+    await collection.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
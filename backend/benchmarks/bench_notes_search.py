@@ -0,0 +1,104 @@
+"""
+GET /api/notes/search on a 1M-note corpus: $text against a $regex scan.
+
+Needs a running MongoDB. Seeds a throwaway collection of 1M notes spread
+over 1000 owners (plus one owner with 100k notes), then times the pipeline
+search_notes runs (first page and a cursor page) against the case-insensitive
+$regex query a naive search would use. Run from the backend directory:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.bench_notes_search
+"""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_benchmark")
+
+from app.routes.notes import NOT_DELETED, _search_pipeline  # noqa: E402
+
+NOTES = 1_000_000
+OWNERS = 1000
+HEAVY_OWNER_NOTES = 100_000
+SEED_BATCH = 10_000
+PAGE_SIZE = 10
+REPEAT = 20
+VOCABULARY = [f"word{i}" for i in range(5000)]
+QUERIES = ["word42", "word7 word1234", '"word10 word11"', "word99 -word100"]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+async def seed(collection, owners, heavy_owner):
+    await collection.drop()
+    await collection.create_indexes([
+        IndexModel([("owner_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("title", "text"), ("content", "text")]),
+    ])
+    rng = random.Random(1)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, NOTES, SEED_BATCH):
+        await collection.insert_many([
+            {
+                "owner_id": heavy_owner if i < HEAVY_OWNER_NOTES else rng.choice(owners),
+                "title": _text(rng, 5),
+                "content": _text(rng, 80),
+                "created_at": start + timedelta(seconds=i),
+                "updated_at": start + timedelta(seconds=i),
+            }
+            for i in range(offset, offset + SEED_BATCH)
+        ])
+
+
+async def timed(label, run):
+    await run()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        await run()
+    elapsed = (time.perf_counter() - start) / REPEAT * 1000
+    print(f"{label:<44} {elapsed:8.2f} ms")
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ["MONGODB_URI"])
+    collection = client[os.environ["MONGODB_DB_NAME"]]["notes_search_bench"]
+    owners = [ObjectId() for _ in range(OWNERS)]
+    heavy_owner = ObjectId()
+    print(f"Seeding {NOTES} notes...")
+    await seed(collection, owners, heavy_owner)
+
+    for label, owner_id in (("typical owner", owners[0]), ("100k-note owner", heavy_owner)):
+        for q in QUERIES:
+            async def text_page(after=None):
+                return await collection.aggregate(
+                    _search_pipeline(owner_id, q, after, PAGE_SIZE), maxTimeMS=60_000
+                ).to_list(PAGE_SIZE)
+
+            first = await text_page()
+            await timed(f"{label}, $text page 1: {q}", text_page)
+            if len(first) == PAGE_SIZE:
+                after = (first[-1]["score"], first[-1]["_id"])
+                await timed(f"{label}, $text page 2: {q}", lambda: text_page(after))
+
+            term = q.split()[0].strip('"')
+            regex = {"owner_id": owner_id, **NOT_DELETED, "$or": [
+                {"title": {"$regex": term, "$options": "i"}},
+                {"content": {"$regex": term, "$options": "i"}},
+            ]}
+            await timed(f"{label}, $regex scan: {term}",
+                        lambda: collection.find(regex).limit(PAGE_SIZE).to_list(PAGE_SIZE))
+
+    await collection.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
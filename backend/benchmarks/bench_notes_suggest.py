@@ -0,0 +1,93 @@
+"""
+GET /api/notes/suggest latency for a user with 50k notes.
+
+Needs a running MongoDB. Seeds a throwaway collection, then times the query
+suggest_notes issues for 1- to 4-character prefixes (p50/p99), next to the
+case-insensitive $regex on title it replaces. Run from the backend directory:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.bench_notes_suggest
+"""
+import asyncio
+import os
+import random
+import string
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_benchmark")
+
+from app.routes.notes import suggest_notes  # noqa: E402
+from app.titles import with_title_norm  # noqa: E402
+
+NOTES = 50_000
+QUERIES = 2000
+LIMIT = 10
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_letters, k=rng.randint(3, 9))) for _ in range(rng.randint(1, 5))
+    )
+
+
+async def seed(collection, owner_id, rng):
+    await collection.drop()
+    await collection.create_indexes([IndexModel([("owner_id", ASCENDING), ("title_norm", ASCENDING)])])
+    now = datetime(2024, 1, 1)
+    await collection.insert_many([
+        with_title_norm({"owner_id": owner_id, "title": _title(rng), "content": "",
+                         "created_at": now, "updated_at": now})
+        for _ in range(NOTES)
+    ])
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+async def timed(label, prefixes, run):
+    samples = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        await run(prefix)
+        samples.append(time.perf_counter() - start)
+    p50, p99 = percentiles(samples)
+    print(f"{label:<24} p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+
+
+class _DB:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getitem__(self, name):
+        return self.collection
+
+
+async def main():
+    client = AsyncIOMotorClient(os.environ["MONGODB_URI"])
+    collection = client[os.environ["MONGODB_DB_NAME"]]["notes_suggest_bench"]
+    rng = random.Random(1)
+    owner_id = ObjectId()
+    await seed(collection, owner_id, rng)
+    db = _DB(collection)
+
+    for length in (1, 2, 4):
+        prefixes = ["".join(rng.choices(string.ascii_letters, k=length)) for _ in range(QUERIES)]
+        await timed(f"title_norm, {length} chars", prefixes,
+                    lambda p: suggest_notes(prefix=p, limit=LIMIT, owner_id=owner_id, db=db))
+        await timed(f"$regex /^p/i, {length} chars", prefixes[:QUERIES // 10],
+                    lambda p: collection.find({"owner_id": owner_id, "title": {"$regex": f"^{p}", "$options": "i"}})
+                    .limit(LIMIT).to_list(LIMIT))
+
+    await collection.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""
+Per-request cost of InMemoryRateLimiter.check at different table sizes.
+
+Run from the backend directory:
+    python -m benchmarks.bench_rate_limit
+"""
+import random
+import time
+
+from app.ratelimit.memory import InMemoryRateLimiter
+
+SIZES = (1_000, 100_000, 1_000_000)
+CHECKS = 200_000
+
+
+def bench(size: int) -> None:
+    limiter = InMemoryRateLimiter(limit=100, period=60, max_keys=size)
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(size)]
+    now = 1_000.0
+    for key in keys:
+        limiter.check(key, now)
+
+    # Existing clients, random access
+    sample = random.choices(keys, k=CHECKS)
+    start = time.perf_counter()
+    for key in sample:
+        limiter.check(key, now)
+    hit_ns = (time.perf_counter() - start) / CHECKS * 1e9
+
+    # New clients at the cap, each one evicts the least recently used key
+    fresh = [f"fresh-{i}" for i in range(CHECKS)]
+    start = time.perf_counter()
+    for key in fresh:
+        limiter.check(key, now)
+    evict_ns = (time.perf_counter() - start) / CHECKS * 1e9
+
+    print(
+        f"{size:>9,} keys: existing key {hit_ns:7.0f} ns/check, "
+        f"new key with eviction {evict_ns:7.0f} ns/check, "
+        f"table size {len(limiter):,}"
+    )
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        bench(size)
@@ -0,0 +1,91 @@
+"""
+Per-response cost of adding security headers: building them from settings on
+every response (the previous implementation) versus appending the block
+precomputed at startup.
+
+Run from the backend directory:
+    python -m benchmarks.bench_security_headers
+"""
+import asyncio
+import os
+import time
+
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_bench")
+
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+from app.middleware.security import CONTENT_SECURITY_POLICY, SecurityHeadersMiddleware
+
+RESPONSES = 200_000
+SCOPE = {"type": "http", "path": "/api/notes", "method": "GET"}
+
+
+def _response_start() -> dict:
+    return {
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-length", b"512"), (b"content-type", b"application/json")],
+    }
+
+
+async def app(scope, receive, send):
+    await send(_response_start())
+
+
+async def receive():
+    return {"type": "http.request"}
+
+
+async def send(message):
+    pass
+
+
+class PerResponseSecurityHeaders:
+    """The previous implementation: flags checked and strings built per response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if settings.is_production():
+                    headers["Strict-Transport-Security"] = f"max-age={settings.HSTS_SECONDS}; includeSubDomains"
+                if settings.FRAME_DENY:
+                    headers["X-Frame-Options"] = "DENY"
+                if settings.XSS_PROTECTION:
+                    headers["X-XSS-Protection"] = "1; mode=block"
+                if settings.CONTENT_TYPE_NOSNIFF:
+                    headers["X-Content-Type-Options"] = "nosniff"
+                headers["X-Permitted-Cross-Domain-Policies"] = "none"
+                headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+                if settings.is_production():
+                    headers["Content-Security-Policy"] = CONTENT_SECURITY_POLICY
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def measure(middleware) -> float:
+    for _ in range(1_000):
+        await middleware(SCOPE, receive, send)
+    start = time.perf_counter()
+    for _ in range(RESPONSES):
+        await middleware(SCOPE, receive, send)
+    return (time.perf_counter() - start) / RESPONSES * 1e9
+
+
+async def main() -> None:
+    baseline = await measure(app)
+    old = await measure(PerResponseSecurityHeaders(app)) - baseline
+    new = await measure(SecurityHeadersMiddleware(app)) - baseline
+    print(f"per-response headers: {old:6.0f} ns/response")
+    print(f"precomputed block:    {new:6.0f} ns/response ({old - new:.0f} ns saved)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
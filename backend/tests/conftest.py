@@ -1,4 +1,341 @@
 import os, sys
+import re
+from copy import deepcopy
+from datetime import datetime
+
+import bson
+import pytest
+from bson import ObjectId
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 # Add the backend directory to the Python path so that app can be imported
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) 
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Required settings so app.config can be imported without a .env file
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "noteapp_test")
+
+
+# In-memory stand-in for a Motor database, enough of the query language for
+# the routes under test. Every call is recorded under the name of the command
+# a driver would send, so tests can count round trips.
+
+_TYPE_ORDER = {type(None): 0, int: 1, float: 1, str: 2, dict: 3, list: 4, ObjectId: 5, bool: 6, datetime: 7}
+
+
+def _sort_key(value):
+    return (_TYPE_ORDER.get(type(value), 8), value if value is not None else 0)
+
+
+def _compare(value, operand, op):
+    if value is None or _TYPE_ORDER.get(type(value)) != _TYPE_ORDER.get(type(operand)):
+        return False
+    return op(value, operand)
+
+
+def _condition(doc, field, condition):
+    present = field in doc
+    value = doc.get(field)
+    if not isinstance(condition, dict) or not any(key.startswith("$") for key in condition):
+        return value == condition or (isinstance(condition, re.Pattern) and bool(condition.search(value or "")))
+    for op, operand in condition.items():
+        if op == "$eq":
+            ok = value == operand
+        elif op == "$ne":
+            ok = value != operand
+        elif op == "$in":
+            ok = value in operand
+        elif op == "$nin":
+            ok = value not in operand
+        elif op == "$exists":
+            ok = present == bool(operand)
+        elif op == "$type":
+            ok = {"string": str, "date": datetime, "objectId": ObjectId}[operand] is type(value)
+        elif op == "$regex":
+            ok = isinstance(value, str) and re.search(operand, value) is not None
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            compare = {
+                "$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b,
+                "$lt": lambda a, b: a < b, "$lte": lambda a, b: a <= b,
+            }[op]
+            ok = _compare(value, operand, compare)
+        else:
+            raise NotImplementedError(f"query operator {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, branch) for branch in condition):
+                return False
+        elif not _condition(doc, key, condition):
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return deepcopy(doc)
+    if all(not spec for field, spec in projection.items() if field != "_id") and any(
+        field != "_id" for field in projection
+    ):
+        return {field: deepcopy(value) for field, value in doc.items() if field not in projection}
+    out = {"_id": doc["_id"]} if projection.get("_id", 1) else {}
+    for field, spec in projection.items():
+        if field == "_id":
+            continue
+        if isinstance(spec, dict) and "$substrCP" in spec:
+            source, start, length = spec["$substrCP"]
+            out[field] = (doc.get(source[1:]) or "")[start:start + length]
+        elif spec and field in doc:
+            out[field] = deepcopy(doc[field])
+    return out
+
+
+def _apply_update(doc, update, inserting=False):
+    for field, value in update.get("$set", {}).items():
+        doc[field] = deepcopy(value)
+    for field in update.get("$unset", {}):
+        doc.pop(field, None)
+    for field, value in update.get("$inc", {}).items():
+        doc[field] = doc.get(field, 0) + value
+    if inserting:
+        for field, value in update.get("$setOnInsert", {}).items():
+            doc[field] = deepcopy(value)
+
+
+class FakeUpdateResult:
+    def __init__(self, matched_count, modified_count=None, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = matched_count if modified_count is None else modified_count
+        self.upserted_id = upserted_id
+
+
+class FakeBulkWriteResult:
+    def __init__(self, result):
+        self.bulk_api_result = result
+        self.inserted_count = result["nInserted"]
+        self.matched_count = result["nMatched"]
+        self.modified_count = result["nModified"]
+        self.upserted_count = result["nUpserted"]
+
+
+class FakeCursor:
+    def __init__(self, collection, docs, projection=None):
+        self.collection = collection
+        self.docs = docs
+        self.projection = projection
+        self.batch = None
+        self.closed = False
+
+    def sort(self, key, direction=None):
+        spec = [(key, direction)] if direction is not None else list(key)
+        for field, order in reversed(spec):
+            self.docs.sort(key=lambda doc: _sort_key(doc.get(field)), reverse=order < 0)
+        return self
+
+    def skip(self, count):
+        self.docs = self.docs[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self.docs = self.docs[:count]
+        return self
+
+    def batch_size(self, size):
+        self.batch = size
+        return self
+
+    async def to_list(self, length=None):
+        return [_project(doc, self.projection) for doc in (self.docs[:length] if length else self.docs)]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield _project(doc, self.projection)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.docs = []
+        self.indexes = []
+        self.cursors = []
+        # Pipelines are not evaluated: aggregate() returns these documents
+        self.aggregate_results = []
+        self.pipelines = []
+        # Method name -> exception raised by the next call to that method
+        self.fail_next = {}
+
+    def _command(self, command, method):
+        self.db.commands.append(command)
+        error = self.fail_next.pop(method, None)
+        if error is not None:
+            raise error
+
+    def _get(self, _id):
+        return next((doc for doc in self.docs if doc["_id"] == _id), None)
+
+    def _insert(self, doc):
+        doc = deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        unique = [("_id",)] + [tuple(index["key"]) for index in self.indexes if index.get("unique")]
+        for fields in unique:
+            key = [doc.get(field) for field in fields]
+            if any([other.get(field) for field in fields] == key for other in self.docs):
+                raise DuplicateKeyError(f"E11000 duplicate key error: {', '.join(fields)}", 11000)
+        self.docs.append(doc)
+        return doc["_id"]
+
+    def _upsert(self, query, update):
+        doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        _apply_update(doc, update, inserting=True)
+        return self._insert(doc)
+
+    def _update(self, query, update, upsert=False):
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is None:
+            if upsert:
+                return FakeUpdateResult(0, 0, self._upsert(query, update))
+            return FakeUpdateResult(0)
+        _apply_update(doc, update)
+        return FakeUpdateResult(1)
+
+    async def create_indexes(self, indexes):
+        self._command("createIndexes", "create_indexes")
+        self.indexes.extend(index.document for index in indexes)
+
+    def find(self, query=None, projection=None):
+        self._command("find", "find")
+        query = query or {}
+        bson.encode(query)  # what the driver sends must be valid BSON
+        # Sorted on whole documents, projected on the way out
+        cursor = FakeCursor(self, [deepcopy(doc) for doc in self.docs if matches(doc, query)], projection)
+        self.cursors.append(cursor)
+        return cursor
+
+    def aggregate(self, pipeline, **kwargs):
+        self._command("aggregate", "aggregate")
+        self.pipelines.append((pipeline, kwargs))
+        return FakeCursor(self, deepcopy(self.aggregate_results))
+
+    async def find_one(self, query=None, projection=None):
+        self._command("find", "find_one")
+        doc = next((doc for doc in self.docs if matches(doc, query or {})), None)
+        return None if doc is None else _project(doc, projection)
+
+    async def count_documents(self, query, limit=0):
+        self._command("aggregate", "count_documents")
+        count = sum(1 for doc in self.docs if matches(doc, query))
+        return min(count, limit) if limit else count
+
+    async def insert_one(self, document):
+        self._command("insert", "insert_one")
+        document.setdefault("_id", ObjectId())
+        self._insert(document)
+
+    async def insert_many(self, documents, ordered=True):
+        self._command("insert", "insert_many")
+        errors, inserted = [], 0
+        for index, document in enumerate(documents):
+            document.setdefault("_id", ObjectId())
+            try:
+                self._insert(document)
+                inserted += 1
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": inserted})
+
+    async def update_one(self, query, update, upsert=False):
+        self._command("update", "update_one")
+        return self._update(query, update, upsert)
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=ReturnDocument.BEFORE,
+                                  upsert=False):
+        self._command("findAndModify", "find_one_and_update")
+        doc = next((doc for doc in self.docs if matches(doc, query)), None)
+        if doc is None:
+            return None
+        before = _project(doc, projection)
+        _apply_update(doc, update)
+        return _project(doc, projection) if return_document == ReturnDocument.AFTER else before
+
+    async def bulk_write(self, requests, ordered=True):
+        self._command("bulkWrite", "bulk_write")
+        result = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nUpserted": 0, "writeErrors": []}
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    request._doc.setdefault("_id", ObjectId())
+                    self._insert(request._doc)
+                    result["nInserted"] += 1
+                elif isinstance(request, UpdateOne):
+                    outcome = self._update(request._filter, request._doc, request._upsert)
+                    result["nMatched"] += outcome.matched_count
+                    result["nModified"] += outcome.modified_count
+                    result["nUpserted"] += outcome.upserted_id is not None
+                else:
+                    raise NotImplementedError(type(request).__name__)
+            except DuplicateKeyError as e:
+                result["writeErrors"].append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return FakeBulkWriteResult(result)
+
+
+class FakeDB:
+    def __init__(self):
+        self.commands = []
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+@pytest.fixture
+def owner_id():
+    return ObjectId()
+
+
+@pytest.fixture
+def client(db, owner_id):
+    """The notes router on its own, signed in as ``owner_id`` and backed by ``db``."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.database import get_mongo_db
+    from app.routes import notes as notes_routes
+    from app.security import get_current_user_id
+
+    app = FastAPI()
+    app.include_router(notes_routes.router, prefix="/api/notes")
+    app.dependency_overrides[get_current_user_id] = lambda: owner_id
+    app.dependency_overrides[get_mongo_db] = lambda: db
+    return TestClient(app)
@@ -0,0 +1,129 @@
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import CompressionMiddleware, choose_encoding
+
+BIG = {"notes": ["x" * 100] * 50}
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/big")
+    async def big():
+        return JSONResponse(BIG, headers={"ETag": '"n-1"'})
+
+    @app.get("/weak")
+    async def weak():
+        return JSONResponse(BIG, headers={"ETag": 'W/"n-1"'})
+
+    @app.get("/cached")
+    async def cached():
+        return Response(status_code=304, headers={"ETag": '"n-1"'})
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/api/health")
+    async def health():
+        return JSONResponse(BIG)
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(b"x" * 5000), media_type="application/x-ndjson",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            yield b"data: " + b"x" * 2000 + b"\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\x00" * 5000, media_type="application/octet-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br", ["zstd", "br", "gzip"]) == "br"
+    assert choose_encoding("br;q=0, gzip;q=0.5", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("*;q=0", ["gzip"]) is None
+    assert choose_encoding("*", ["zstd", "gzip"]) == "zstd"
+    assert choose_encoding("identity", ["gzip"]) is None
+
+
+def test_large_json_is_gzipped_with_its_own_etag():
+    response = _app().get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == '"n-1-gzip"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < 1000
+    assert response.json() == BIG
+
+
+def test_weak_etag_is_kept_and_304_echoes_the_cached_tag():
+    client = _app()
+    assert client.get("/weak", headers={"Accept-Encoding": "gzip"}).headers["ETag"] == 'W/"n-1"'
+    assert client.get("/small", headers={"Accept-Encoding": "gzip"}).headers.get("ETag") is None
+
+    cached = client.get("/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": '"n-1-gzip"'})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == '"n-1-gzip"'
+    assert client.get("/cached", headers={"If-None-Match": '"n-1"'}).headers["ETag"] == '"n-1"'
+
+
+@pytest.mark.parametrize("path", ["/small", "/api/health", "/events", "/binary"])
+def test_skipped_responses(path):
+    response = _app().get(path, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_already_encoded_response_is_not_compressed_twice():
+    response = _app().get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == b"x" * 5000
+
+
+def test_no_compression_without_accept_encoding():
+    response = _app().get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_are_flushed_as_they_come():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": b'{"n": %d}\n' % i, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/api/notes/export", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(app, minimum_size=500)(scope, None, send)
+
+    start, *bodies = sent
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    assert not any(name == b"content-length" for name, _ in start["headers"])
+    decompressor = zlib.decompressobj(31)
+    # Each chunk decodes on its own, before the stream ends
+    assert decompressor.decompress(bodies[0]["body"]) == b'{"n": 0}\n'
+    assert decompressor.decompress(bodies[1]["body"]) == b'{"n": 1}\n'
+    rest = b"".join(body["body"] for body in bodies[2:])
+    assert decompressor.decompress(rest) == b'{"n": 2}\n'
+    assert decompressor.eof
+    assert bodies[-1].get("more_body", False) is False
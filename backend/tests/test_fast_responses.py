@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.models.note import Note
+from app.responses import FastJSONResponse, _default, document_encoder
+from app.schemas.user import UserOut
+
+
+def _note_doc(**overrides):
+    doc = {
+        "_id": ObjectId(),
+        "owner_id": ObjectId(),
+        "title": "Grocery list ✓",
+        "content": 'eggs, "milk"\nbread',
+        "title_norm": "grocery list",
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, 123000),
+        "updated_at": datetime(2024, 1, 2, 3, 4, 5),
+    }
+    doc.update(overrides)
+    return doc
+
+
+def test_fast_note_json_matches_response_model_serialization():
+    encode = document_encoder(Note)
+    docs = [_note_doc(), _note_doc(updated_at=datetime(2024, 5, 6, tzinfo=timezone.utc))]
+
+    body = FastJSONResponse([encode(doc) for doc in docs]).body
+    expected = jsonable_encoder([Note(**doc) for doc in docs])
+
+    assert json.loads(body) == expected
+    assert list(json.loads(body)[0]) == list(expected[0])
+
+
+def test_user_encoder_leaves_out_other_fields():
+    user = {"_id": ObjectId(), "email": "a@example.com", "hashed_password": "secret"}
+
+    body = json.loads(FastJSONResponse(document_encoder(UserOut)(user)).body)
+
+    assert body == jsonable_encoder(UserOut(**user))
+    assert "hashed_password" not in body
+
+
+def test_default_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        _default(object())
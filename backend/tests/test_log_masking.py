@@ -0,0 +1,51 @@
+import json
+import logging
+
+from app.logging_config import SecurityJsonFormatter
+
+FMT = "%(timestamp)s %(levelname)s %(name)s %(message)s"
+
+
+def _format(msg, extra=None, mask_sensitive=True) -> dict:
+    formatter = SecurityJsonFormatter(fmt=FMT, mask_sensitive=mask_sensitive)
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, None, None)
+    for key, value in (extra or {}).items():
+        setattr(record, key, value)
+    return json.loads(formatter.format(record))
+
+
+def test_masks_every_field_in_one_pass():
+    masked = SecurityJsonFormatter.mask_sensitive_data(
+        "Password: hunter2 token=abc api_key=xyz Auth:Bearer secret= s3"
+    )
+    assert masked == "password=***** token=***** api_key=***** auth=***** secret=*****"
+
+
+def test_messages_without_secrets_are_untouched():
+    message = "User authenticated successfully: alice@example.com"
+    assert SecurityJsonFormatter.mask_sensitive_data(message) is message
+
+
+def test_masks_message_and_extra_fields():
+    record = _format(
+        "reset with token=abc123",
+        extra={"api_key": "xyz", "note": "secret: s3", "email": "alice@example.com", "auth_header": None},
+    )
+
+    assert record["message"] == "reset with token=*****"
+    assert record["api_key"] == "*****"
+    assert record["note"] == "secret=*****"
+    assert record["email"] == "alice@example.com"
+    assert record["auth_header"] is None
+    assert record["name"] == "test"
+
+
+def test_masks_dict_messages():
+    record = _format({"event": "password_reset", "password": "hunter2"})
+
+    assert record["password"] == "*****"
+    assert record["event"] == "password_reset"
+
+
+def test_masking_can_be_disabled():
+    assert _format("token=abc", mask_sensitive=False)["message"] == "token=abc"
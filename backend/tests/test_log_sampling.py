@@ -0,0 +1,119 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.logging_config import RepeatedMessageFilter, SamplingFilter
+from app.middleware.logging import RequestLoggingMiddleware
+
+
+def _record(msg, *args, level=logging.WARNING, name="app.routes.auth") -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_sampling_keeps_warnings_and_samples_info(monkeypatch):
+    sampler = SamplingFilter(rate=0.25)
+
+    assert sampler.filter(_record("Slow request", level=logging.WARNING))
+    assert sampler.filter(_record("Request failed", level=logging.ERROR))
+
+    monkeypatch.setattr("app.logging_config.random.random", lambda: 0.2)
+    assert sampler.filter(_record("Request completed", level=logging.INFO))
+    monkeypatch.setattr("app.logging_config.random.random", lambda: 0.3)
+    assert not sampler.filter(_record("Request completed", level=logging.INFO))
+
+
+def test_repeats_of_a_message_are_collapsed_into_a_summary(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.logging_config.time.monotonic", lambda: clock[0])
+    emitted = []
+    repeats = RepeatedMessageFilter(window=60, emit=emitted.append)
+
+    passed = [repeats.filter(_record("Failed login attempt for user: %s", "a@example.com")) for _ in range(5)]
+    assert passed == [True, False, False, False, False]
+    assert repeats.suppressed_total == 4
+    # Other users, levels and templates are not affected
+    assert repeats.filter(_record("Failed login attempt for user: %s", "b@example.com"))
+    assert repeats.filter(_record("Failed login attempt for user: %s", "a@example.com", level=logging.INFO))
+    assert repeats.filter(_record("Registration attempt for existing email: %s", "a@example.com"))
+
+    clock[0] += 61
+    assert repeats.filter(_record("Failed login attempt for user: %s", "a@example.com"))
+
+    assert len(emitted) == 1
+    summary = emitted[0].getMessage()
+    assert summary.startswith("Suppressed 4 repeats of 'Failed login attempt for user: %s'")
+    assert "a@example.com" in summary
+    assert emitted[0].levelno == logging.WARNING
+
+
+def test_tracked_messages_are_bounded():
+    repeats = RepeatedMessageFilter(window=60, max_keys=2)
+    for user in ("a", "b", "c"):
+        repeats.filter(_record("Failed login attempt for user: %s", user))
+
+    # "c" was not tracked, so its repeats still pass
+    assert repeats.filter(_record("Failed login attempt for user: %s", "c"))
+    assert not repeats.filter(_record("Failed login attempt for user: %s", "a"))
+
+
+def test_flush_reports_pending_repeats():
+    emitted = []
+    repeats = RepeatedMessageFilter(window=60, emit=emitted.append)
+    for _ in range(3):
+        repeats.filter(_record("Disk almost full"))
+
+    repeats.flush()
+
+    assert [record.getMessage().split(" within")[0] for record in emitted] == [
+        "Suppressed 2 repeats of 'Disk almost full'"
+    ]
+
+
+def _logged_app(monkeypatch, status_code=200, delay=0.0):
+    async def app(scope, receive, send):
+        clock[0] += delay
+        await send({"type": "http.response.start", "status": status_code, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    clock = [0.0]
+    monkeypatch.setattr("app.middleware.logging.time.perf_counter", lambda: clock[0])
+    return TestClient(RequestLoggingMiddleware(app))
+
+
+def test_request_records_reach_the_sampling_filter(monkeypatch, caplog):
+    monkeypatch.setattr("app.logging_config.random.random", lambda: 0.99)
+    sampler = SamplingFilter(rate=0.5)
+    request_logger = logging.getLogger("api")
+    request_logger.addFilter(sampler)
+    try:
+        with caplog.at_level(logging.INFO, logger="api"):
+            fast = _logged_app(monkeypatch).get("/ping")
+            _logged_app(monkeypatch, delay=60.0).get("/slow")
+            _logged_app(monkeypatch, status_code=503).get("/down")
+    finally:
+        request_logger.removeFilter(sampler)
+
+    assert fast.headers["X-Request-ID"]
+    # The fast request was sampled out; slow and failed ones are always kept
+    assert [(r.levelno, r.url.rsplit("/", 1)[1]) for r in caplog.records] == [
+        (logging.WARNING, "slow"), (logging.ERROR, "down"),
+    ]
+    assert caplog.records[1].status_code == 503
+
+
+def test_slow_requests_to_different_urls_are_all_kept(monkeypatch, caplog):
+    # As installed by setup_logging: the request logger is left out of the repeat filter
+    repeats = RepeatedMessageFilter(window=60, excluded=("api",))
+    caplog.handler.addFilter(repeats)
+    try:
+        with caplog.at_level(logging.INFO, logger="api"):
+            for i in range(5):
+                _logged_app(monkeypatch, delay=60.0).get(f"/slow/{i}")
+    finally:
+        caplog.handler.removeFilter(repeats)
+
+    assert [r.url.rsplit("/", 1)[1] for r in caplog.records] == ["0", "1", "2", "3", "4"]
+    assert repeats.suppressed_total == 0
+    # Other loggers are still collapsed
+    assert repeats.filter(_record("Disk almost full"))
+    assert not repeats.filter(_record("Disk almost full"))
@@ -0,0 +1,41 @@
+import io
+import logging
+import queue
+
+from app.logging_config import DropCountingQueueHandler, FlushingQueueListener
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_full_queue_drops_and_counts_without_blocking():
+    handler = DropCountingQueueHandler(queue.Queue(maxsize=2))
+    logger = _logger("test.pipeline.drop", handler)
+
+    for i in range(5):
+        logger.info("record %d", i)
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_listener_formats_off_thread_and_flushes_on_stop():
+    stream = io.StringIO()
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    handler = DropCountingQueueHandler(queue.Queue(maxsize=100))
+    listener = FlushingQueueListener(handler.queue, output)
+    logger = _logger("test.pipeline.flush", handler)
+
+    listener.start()
+    args = {"user": "alice"}
+    logger.info("login %s", args)
+    args["user"] = "mallory"  # the enqueued message is already frozen
+    listener.stop()
+
+    assert stream.getvalue() == "INFO login {'user': 'alice'}\n"
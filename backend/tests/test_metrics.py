@@ -0,0 +1,69 @@
+import json
+import threading
+
+from app import metrics
+from app.metrics import Counter, Gauge, Histogram, MetricsRegistry, collect_all, render
+
+
+def make_registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def test_counter_merges_per_thread_shards(monkeypatch):
+    make_registry(monkeypatch)
+    requests = Counter("requests_total", "Requests", ("route",))
+
+    def record():
+        for _ in range(1000):
+            requests.inc(("/a",))
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests.inc(("/b",), 2)
+
+    assert requests._merged() == {("/a",): 4000, ("/b",): 2}
+
+
+def test_histogram_renders_cumulative_buckets(monkeypatch):
+    make_registry(monkeypatch)
+    latency = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(("/a",), value)
+
+    text = render(collect_all())
+
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+    assert 'latency_seconds_sum{route="/a"} 4.05' in text
+
+
+def test_multiprocess_merge_sums_counters_and_drops_dead_gauges(monkeypatch, tmp_path):
+    make_registry(monkeypatch)
+    monkeypatch.setattr(metrics.settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    requests = Counter("requests_total", "Requests", ("route",))
+    in_flight = Gauge("in_flight", "In flight")
+    requests.inc(("/a",), 3)
+    in_flight.inc()
+
+    dead_worker = {
+        "pid": 2 ** 22 + 1,  # above the default pid_max, never alive
+        "metrics": {
+            "requests_total": {"type": "counter", "help": "Requests", "labelnames": ["route"],
+                               "samples": [[["/a"], 5]]},
+            "in_flight": {"type": "gauge", "help": "In flight", "labelnames": [],
+                          "samples": [[[], 7]]},
+        },
+    }
+    (tmp_path / "metrics-dead.json").write_text(json.dumps(dead_worker))
+
+    text = render(collect_all())
+
+    assert 'requests_total{route="/a"} 8' in text
+    assert "in_flight 1" in text
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo import IndexModel
+
+from app.routes import notes as notes_routes
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def notes(db, monkeypatch):
+    monkeypatch.setattr(notes_routes, "_utcnow", lambda: NOW)
+    return db["notes"]
+
+
+def _add(notes, owner_id, **fields):
+    doc = {"_id": ObjectId(), "owner_id": owner_id, "title": "t", "content": "c",
+           "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1), **fields}
+    notes.docs.append(doc)
+    return doc["_id"]
+
+
+def _post(client, operations):
+    return client.post("/api/notes/batch", json={"operations": operations})
+
+
+def test_batch_runs_as_one_bulk_write_with_per_operation_results(client, db, notes, owner_id):
+    mine, other = _add(notes, owner_id), _add(notes, ObjectId())
+    kept = _add(notes, owner_id, title="kept")
+
+    response = _post(client, [
+        {"op": "create", "title": "new", "content": "c"},
+        {"op": "update", "id": str(kept), "title": "renamed"},
+        {"op": "update", "id": str(other), "title": "not mine"},
+        {"op": "delete", "id": str(mine)},
+        {"op": "update", "id": str(mine), "content": "after delete"},
+        {"op": "delete", "id": "bad-id"},
+        {"op": "create", "title": "no content"},
+    ])
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 200, 404, 200, 404, 400, 400]
+    assert results[1]["updated_at"] == NOW.isoformat()
+    # One ownership query, one write
+    assert db.commands == ["find", "bulkWrite"]
+
+    created = notes._get(ObjectId(results[0]["id"]))
+    assert created["owner_id"] == owner_id and created["title"] == "new"
+    assert notes._get(kept)["title"] == "renamed"
+    assert notes._get(kept)["title_norm"] == "renamed"
+    assert notes._get(other)["title"] == "t"
+    # Deletes leave a tombstone for /changes
+    tombstone = notes._get(mine)
+    assert tombstone["deleted"] is True and tombstone["deleted_at"] == NOW
+    assert "content" not in tombstone
+
+
+def test_note_deleted_concurrently_is_not_reported_as_updated(client, notes, owner_id, monkeypatch):
+    gone, kept = _add(notes, owner_id), _add(notes, owner_id)
+    bulk_write = notes.bulk_write
+
+    async def delete_first(requests, ordered=True):
+        # Another request deletes the note between the ownership check and the write
+        notes._get(gone).update(deleted=True, deleted_at=datetime(2024, 5, 1), updated_at=datetime(2024, 5, 1))
+        return await bulk_write(requests, ordered=ordered)
+
+    monkeypatch.setattr(notes, "bulk_write", delete_first)
+
+    results = _post(client, [
+        {"op": "update", "id": str(gone), "title": "lost"},
+        {"op": "update", "id": str(kept), "title": "saved"},
+        {"op": "delete", "id": str(gone)},
+    ]).json()["results"]
+
+    assert [(r["status"], r["error"]) for r in results] == [(404, "Note not found"), (200, None), (404, "Note not found")]
+    assert results[0]["updated_at"] is None
+    assert notes._get(gone)["deleted_at"] == datetime(2024, 5, 1)
+    assert notes._get(kept)["title"] == "saved"
+
+
+def test_ordered_write_error_marks_failed_and_skipped_operations(client, notes, owner_id):
+    notes.indexes.append(IndexModel([("title", 1)], unique=True).document)
+    mine = _add(notes, owner_id, title="mine")
+    _add(notes, owner_id, title="taken")
+
+    results = _post(client, [
+        {"op": "update", "id": str(mine), "title": "ok"},
+        {"op": "create", "title": "taken", "content": "c"},
+        {"op": "delete", "id": str(mine)},
+    ]).json()["results"]
+
+    assert [r["status"] for r in results] == [200, 500, 500]
+    assert "duplicate key" in results[1]["error"]
+    assert results[2]["error"] == "Not executed"
+    assert results[1]["id"] is None
+    # Applied up to the failure, nothing after it
+    assert notes._get(mine)["title"] == "ok"
+    assert "deleted" not in notes._get(mine)
+    assert len(notes.docs) == 2
+
+
+def test_batch_size_is_limited(client, monkeypatch):
+    monkeypatch.setattr(notes_routes.settings, "NOTES_BATCH_MAX_OPERATIONS", 1)
+    response = _post(client, [{"op": "delete", "id": str(ObjectId())}] * 2)
+    assert response.status_code == 400
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.pagination import encode_cursor
+from app.routes import notes as notes_routes
+from app.routes.notes import get_changes
+
+
+def _write(db, owner_id, at, deleted=False, _id=None):
+    """Store a note (or its tombstone) the way the write routes leave it."""
+    doc = {"_id": _id or ObjectId(), "owner_id": owner_id, "created_at": at, "updated_at": at}
+    if deleted:
+        doc.update(deleted=True, deleted_at=at)
+    else:
+        doc.update(title="t", content="c")
+    notes = db["notes"]
+    notes.docs = [d for d in notes.docs if d["_id"] != doc["_id"]] + [doc]
+    return doc["_id"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [datetime(2024, 6, 1, 12, 0, 0)]
+    monkeypatch.setattr(notes_routes, "_utcnow", lambda: now[0])
+    return now
+
+
+@pytest.mark.asyncio
+async def test_full_sync_pages_then_deltas_and_tombstones(clock, db, owner_id):
+    start = clock[0] - timedelta(hours=1)
+    ids = [_write(db, owner_id, start + timedelta(minutes=i)) for i in range(5)]
+    _write(db, ObjectId(), start)  # someone else's note
+
+    first = await get_changes(since=None, limit=3, owner_id=owner_id, db=db)
+    assert not first.complete and len(first.notes) == 3
+    second = await get_changes(since=first.sync_token, limit=3, owner_id=owner_id, db=db)
+    assert second.complete and len(second.notes) == 2
+    assert {str(n.id) for n in first.notes + second.notes} == {str(i) for i in ids}
+
+    # A minute later one note is edited and one deleted
+    clock[0] += timedelta(minutes=1)
+    _write(db, owner_id, clock[0], _id=ids[0])
+    _write(db, owner_id, clock[0], deleted=True, _id=ids[1])
+
+    delta = await get_changes(since=second.sync_token, limit=3, owner_id=owner_id, db=db)
+    assert delta.complete
+    assert [str(n.id) for n in delta.notes] == [str(ids[0])]
+    assert [t.id for t in delta.deleted] == [str(ids[1])]
+
+
+@pytest.mark.asyncio
+async def test_late_commit_within_lookback_is_not_missed(clock, db, owner_id):
+    synced = await get_changes(since=None, limit=10, owner_id=owner_id, db=db)
+
+    # Written on another server a moment before the sync, committed after it
+    late = _write(db, owner_id, clock[0] - timedelta(seconds=1))
+    clock[0] += timedelta(seconds=2)
+
+    delta = await get_changes(since=synced.sync_token, limit=10, owner_id=owner_id, db=db)
+    assert [str(n.id) for n in delta.notes] == [str(late)]
+
+
+@pytest.mark.asyncio
+async def test_invalid_and_expired_tokens(clock, db):
+    with pytest.raises(HTTPException) as e:
+        await get_changes(since="garbage", limit=10, owner_id=ObjectId(), db=db)
+    assert e.value.status_code == 400
+
+    old = encode_cursor("c", clock[0] - timedelta(days=365))
+    with pytest.raises(HTTPException) as e:
+        await get_changes(since=old, limit=10, owner_id=ObjectId(), db=db)
+    assert e.value.status_code == 410
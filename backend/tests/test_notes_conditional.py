@@ -0,0 +1,125 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.conditional import encoded_etag, modified_since, none_match, strip_coding
+from app.middleware.compression import CompressionMiddleware
+from app.routes import notes as notes_routes
+from app.routes.notes import _if_match_filter, _note_etag
+
+UPDATED_AT = datetime(2024, 3, 4, 5, 6, 7, 891000)
+
+
+def test_note_etag_round_trips_through_if_match():
+    note_id = ObjectId()
+    etag = _note_etag(note_id, UPDATED_AT)
+    assert etag == f'"{note_id}-1709528767891"'
+
+    assert _if_match_filter(f'"x", {etag}', note_id) == {"updated_at": {"$in": [UPDATED_AT]}}
+    assert _if_match_filter("*", note_id) == {}
+    # The tag of a compressed response names the same version
+    assert _if_match_filter(encoded_etag(etag, "gzip"), note_id) == {"updated_at": {"$in": [UPDATED_AT]}}
+    # Weak tags and other notes' tags never match
+    assert _if_match_filter(f"W/{etag}", note_id) is None
+    assert _if_match_filter(_note_etag(ObjectId(), UPDATED_AT), note_id) is None
+
+
+def test_header_comparisons():
+    assert not none_match('W/"a", "b"', '"a"')
+    assert not none_match("*", '"a"')
+    assert not none_match('"a-br"', '"a"')
+    assert strip_coding('W/"a-zstd"') == 'W/"a"'
+    assert none_match('"b"', '"a"')
+    assert not modified_since("Mon, 04 Mar 2024 05:06:07 GMT", UPDATED_AT)
+    assert modified_since("Mon, 04 Mar 2024 05:06:06 GMT", UPDATED_AT)
+    assert modified_since("garbage", UPDATED_AT)
+
+
+@pytest.fixture
+def note_url(db, owner_id):
+    note_id = ObjectId()
+    db["notes"].docs.append({"_id": note_id, "owner_id": owner_id, "title": "t", "content": "c",
+                             "created_at": UPDATED_AT, "updated_at": UPDATED_AT})
+    return f"/api/notes/{note_id}"
+
+
+def test_get_note_answers_304_for_current_version(client, note_url):
+    first = client.get(note_url)
+    assert first.status_code == 200
+    assert first.headers["Last-Modified"] == "Mon, 04 Mar 2024 05:06:07 GMT"
+
+    cached = client.get(note_url, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == first.headers["ETag"]
+
+    assert client.get(note_url, headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+    assert client.get(note_url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_put_with_if_match_is_atomic_and_412_when_stale(client, db, note_url, monkeypatch):
+    etag = client.get(note_url).headers["ETag"]
+    monkeypatch.setattr(notes_routes, "_utcnow", lambda: datetime(2024, 3, 5))
+    db.commands.clear()
+
+    updated = client.put(note_url, json={"title": "new"}, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+    # Version check and write in one command
+    assert db.commands == ["findAndModify"]
+
+    stale = client.put(note_url, json={"title": "newer"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert db["notes"].docs[0]["title"] == "new"
+
+    current = client.put(note_url, json={"title": "newest"}, headers={"If-Match": updated.headers["ETag"]})
+    assert current.status_code == 200
+    assert db["notes"].docs[0]["title"] == "newest"
+
+
+@pytest.mark.parametrize("if_match", ["*", '"whatever"', None])
+def test_put_on_a_missing_note_fails_its_precondition(client, if_match):
+    headers = {} if if_match is None else {"If-Match": if_match}
+    response = client.put(f"/api/notes/{ObjectId()}", json={"title": "x"}, headers=headers)
+    assert response.status_code == (404 if if_match is None else 412)
+
+
+def test_list_etag_follows_the_page(client, db, owner_id, note_url, monkeypatch):
+    monkeypatch.setattr(notes_routes, "_utcnow", lambda: datetime(2024, 3, 5))
+    first = client.get("/api/notes/", params={"limit": 5})
+    assert first.status_code == 200
+    # The page is the only read
+    assert db.commands == ["find"]
+
+    cached = client.get("/api/notes/", params={"limit": 5}, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # Other parameters give a different tag
+    other = client.get("/api/notes/", params={"limit": 6}, headers={"If-None-Match": first.headers["ETag"]})
+    assert other.status_code == 200
+
+    # So does any change to a note on the page
+    client.put(note_url, json={"title": "new"})
+    changed = client.get("/api/notes/", params={"limit": 5}, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json()[0]["title"] == "new"
+
+
+def test_compressed_note_keeps_working_with_conditional_requests(client, db, note_url):
+    db["notes"].docs[0]["content"] = "c" * 2000
+    client.app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    first = client.get(note_url, headers={"Accept-Encoding": "gzip"})
+    assert first.headers["Content-Encoding"] == "gzip"
+    etag = first.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    cached = client.get(note_url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    updated = client.put(note_url, json={"title": "new"}, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    assert client.put(note_url, json={"title": "newer"}, headers={"If-Match": etag}).status_code == 412
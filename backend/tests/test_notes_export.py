@@ -0,0 +1,62 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.note import Note
+from app.routes import notes as notes_routes
+from app.routes.notes import _export_chunks
+
+
+def _docs(owner_id, count):
+    start = datetime(2024, 1, 1, 12, 0, 0, 123000)
+    return [
+        {
+            "_id": ObjectId(),
+            "owner_id": owner_id,
+            "title": f"Note {i}",
+            "content": "naïve ✓ " * 50,
+            "created_at": start,
+            "updated_at": start + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+async def _collect(db, owner_id, compress):
+    return [chunk async for chunk in _export_chunks(db, owner_id, compress)]
+
+
+@pytest.mark.asyncio
+async def test_export_streams_notes_in_response_model_shape(monkeypatch, db, owner_id):
+    monkeypatch.setattr(notes_routes, "EXPORT_CHUNK_BYTES", 2048)
+    docs = _docs(owner_id, 50)
+    db["notes"].docs.extend(docs)
+    # Neither other users' notes nor tombstones are exported
+    db["notes"].docs.extend(_docs(ObjectId(), 2))
+    db["notes"].docs.append({"_id": ObjectId(), "owner_id": owner_id, "deleted": True,
+                             "deleted_at": datetime(2024, 1, 2), "updated_at": datetime(2024, 1, 2)})
+
+    chunks = await _collect(db, owner_id, compress=False)
+
+    assert len(chunks) > 1
+    lines = b"".join(chunks).decode().splitlines()
+    # Newest first, like the note list
+    assert [json.loads(line) for line in lines] == [
+        Note(**doc).model_dump(mode="json", by_alias=True) for doc in reversed(docs)
+    ]
+    cursor, = db["notes"].cursors
+    assert cursor.batch == notes_routes.settings.NOTES_EXPORT_BATCH_SIZE
+    assert cursor.closed
+
+
+@pytest.mark.asyncio
+async def test_export_gzip_and_empty(db, owner_id):
+    assert await _collect(db, owner_id, compress=False) == []
+    assert gzip.decompress(b"".join(await _collect(db, owner_id, compress=True))) == b""
+
+    db["notes"].docs.extend(_docs(owner_id, 3))
+    compressed = b"".join(await _collect(db, owner_id, compress=True))
+    assert len(gzip.decompress(compressed).decode().splitlines()) == 3
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.routes import notes as notes_routes
+from app.routes.notes import _parse_fields
+
+
+def test_parse_fields():
+    assert _parse_fields(None, "full") is None
+    assert _parse_fields(None, "summary") == ("title", "preview", "updated_at")
+    # Response order, not request order; _id is implied
+    assert _parse_fields("updated_at, title,_id", "summary") == ("title", "updated_at")
+    with pytest.raises(HTTPException) as exc:
+        _parse_fields("title,hashed_password", "full")
+    assert exc.value.status_code == 400
+
+
+@pytest.fixture
+def note_id(db, owner_id):
+    note_id = ObjectId()
+    db["notes"].docs.append({
+        "_id": note_id, "owner_id": owner_id, "title": "t", "content": "x" * 1000,
+        "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 2),
+    })
+    return note_id
+
+
+def test_summary_view_returns_only_summary_fields(client, db, note_id, monkeypatch):
+    monkeypatch.setattr(notes_routes.settings, "NOTES_PREVIEW_CHARS", 50)
+
+    summary = client.get("/api/notes/", params={"view": "summary", "limit": 1})
+
+    assert summary.json() == [{
+        "_id": str(note_id), "title": "t", "preview": "x" * 50, "updated_at": "2024-01-02T00:00:00",
+    }]
+    # The full content is never read, only its first characters
+    assert "content" not in db["notes"].cursors[-1].projection
+    # The cursor key is read even when it is not returned
+    assert "X-Next-Cursor" in summary.headers
+
+
+def test_fields_and_full_view(client, note_id):
+    titles = client.get("/api/notes/", params={"fields": "title", "limit": 1})
+    assert titles.json() == [{"_id": str(note_id), "title": "t"}]
+    assert "X-Next-Cursor" in titles.headers
+
+    full = client.get("/api/notes/").json()
+    assert full[0]["content"] == "x" * 1000
+    assert full[0]["created_at"] == "2024-01-01T00:00:00"
+
+    assert client.get("/api/notes/", params={"fields": "password"}).status_code == 400
+
+
+def test_openapi_documents_both_shapes(client):
+    schema = client.app.openapi()
+    response = schema["paths"]["/api/notes/"]["get"]["responses"]["200"]
+    assert "anyOf" in response["content"]["application/json"]["schema"]
@@ -0,0 +1,126 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from bson import ObjectId
+from pymongo import IndexModel
+
+from app.ndjson import iter_lines
+from app.routes import notes as notes_routes
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _lines(*chunks, max_line_bytes=100, gzip=False):
+    return [item async for item in iter_lines(_chunks(*chunks), max_line_bytes, gzip=gzip)]
+
+
+@pytest.mark.asyncio
+async def test_lines_split_across_chunks():
+    assert await _lines(b'{"a": 1}\n{"b"', b': 2}\r\n\n', b'{"c": 3}') == [
+        (1, b'{"a": 1}'),
+        (2, b'{"b": 2}\r'),
+        (4, b'{"c": 3}'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_overlong_lines_are_skipped_without_buffering():
+    long_line = b"x" * 50
+    assert await _lines(b"ok\n" + long_line, long_line, b"\nok\n" + long_line * 2, max_line_bytes=60) == [
+        (1, b"ok"), (2, None), (3, b"ok"), (4, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_gzip_body():
+    body = gzip.compress(b"".join(b'{"n": %d}\n' % i for i in range(1000)))
+    lines = await _lines(body[:10], body[10:], gzip=True)
+    assert len(lines) == 1000
+    assert lines[-1] == (1000, b'{"n": 999}')
+
+
+@pytest.mark.asyncio
+async def test_concatenated_gzip_members_are_one_body():
+    body = gzip.compress(b'{"a": 1}\n{"b"') + gzip.compress(b': 2}\n')
+    assert await _lines(body[:30], body[30:], gzip=True) == [(1, b'{"a": 1}'), (2, b'{"b": 2}')]
+
+
+@pytest.mark.asyncio
+async def test_truncated_gzip_body_raises_without_the_partial_line():
+    body = gzip.compress(b'{"a": 1}\n{"b": 2}')
+    lines = []
+    with pytest.raises(EOFError):
+        async for item in iter_lines(_chunks(body[:-4]), 100, gzip=True):
+            lines.append(item)
+    assert lines == [(1, b'{"a": 1}')]
+
+    with pytest.raises(zlib.error):
+        await _lines(body + b"trailing garbage", gzip=True)
+
+
+def _stored(db):
+    return sorted(doc["title"] for doc in db["notes"].docs)
+
+
+def test_import_inserts_in_batches_and_reports_bad_lines(monkeypatch, client, db, owner_id):
+    monkeypatch.setattr(notes_routes.settings, "NOTES_IMPORT_BATCH_SIZE", 2)
+    db["notes"].indexes.append(IndexModel([("title", 1)], unique=True).document)
+    db["notes"].docs.append({"_id": ObjectId(), "owner_id": owner_id, "title": "dup", "content": ""})
+    lines = [
+        json.dumps({"title": "one", "content": "a"}),
+        "not json",
+        json.dumps({"title": "two", "content": "b"}),
+        json.dumps({"title": "dup", "content": "c"}),
+        json.dumps({"content": "missing title"}),
+        json.dumps({"title": "three", "content": "d"}),
+    ]
+
+    response = client.post("/api/notes/import", content="\n".join(lines))
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 3
+    assert result["failed"] == 3
+    errors = {error["line"]: error["error"] for error in result["errors"]}
+    assert sorted(errors) == [2, 4, 5]
+    assert "duplicate key" in errors[4]
+    assert "title" in errors[5]
+    assert _stored(db) == ["dup", "one", "three", "two"]
+    assert all(doc["owner_id"] == owner_id for doc in db["notes"].docs)
+    # Two batches of two valid lines each
+    assert db.commands.count("insert") == 2
+
+
+def test_import_accepts_gzip_and_rejects_other_encodings(client, db):
+    body = gzip.compress(b'{"title": "t", "content": "c"}\n')
+
+    response = client.post("/api/notes/import", content=body, headers={"Content-Encoding": "gzip"})
+    assert response.json()["inserted"] == 1
+    assert _stored(db) == ["t"]
+
+    response = client.post("/api/notes/import", content=b"", headers={"Content-Encoding": "br"})
+    assert response.status_code == 415
+
+
+def test_truncated_gzip_import_is_rejected(client, db):
+    body = gzip.compress(b'{"title": "t", "content": "c"}\n' * 3)
+
+    response = client.post("/api/notes/import", content=body[:-8], headers={"Content-Encoding": "gzip"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "truncated gzip body"
+    assert _stored(db) == []
+
+
+def test_corrupt_gzip_import_is_rejected(client, db):
+    response = client.post("/api/notes/import", content=b"not gzip at all\n",
+                           headers={"Content-Encoding": "gzip"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Body is not valid gzip"
+    assert _stored(db) == []
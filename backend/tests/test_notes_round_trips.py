@@ -0,0 +1,90 @@
+"""
+Counts the MongoDB commands issued by the note write handlers.
+
+Each test runs twice: against the in-memory database from conftest, which
+records one entry per command, and against a real MongoDB (MONGODB_URI)
+watched by a pymongo CommandListener, skipped when it is not reachable.
+"""
+import os
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from fastapi import Response
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.models.note import NoteCreate, NoteUpdate
+from app.routes.notes import create_note, update_note
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name not in ("ping", "endSessions"):
+            self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+@pytest_asyncio.fixture(params=["memory", "mongodb"])
+async def mongo(request, db):
+    """``(db, commands)``: a database and the names of the commands sent to it."""
+    if request.param == "memory":
+        yield db, db.commands
+        return
+
+    listener = CommandCounter()
+    client = AsyncIOMotorClient(
+        os.environ["MONGODB_URI"],
+        event_listeners=[listener],
+        serverSelectionTimeoutMS=500,
+    )
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        client.close()
+        pytest.skip("MongoDB is not available")
+
+    real_db = client[f"{os.environ['MONGODB_DB_NAME']}_round_trips"]
+    listener.commands.clear()
+    yield real_db, listener.commands
+    await client.drop_database(real_db.name)
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_create_note_issues_a_single_insert(mongo):
+    db, commands = mongo
+    owner_id = ObjectId()
+
+    note = await create_note(NoteCreate(title="Hello", content="World"), Response(), owner_id=owner_id, db=db)
+
+    assert commands == ["insert"]
+    stored = await db["notes"].find_one({"_id": note.id})
+    assert stored["title"] == "Hello"
+    assert stored["owner_id"] == owner_id
+    assert stored["updated_at"] == note.updated_at
+
+
+@pytest.mark.asyncio
+async def test_update_note_issues_a_single_find_and_modify(mongo):
+    db, commands = mongo
+    owner_id = ObjectId()
+    note = await create_note(NoteCreate(title="Hello", content="World"), Response(), owner_id=owner_id, db=db)
+    commands.clear()
+
+    updated = await update_note(str(note.id), NoteUpdate(title="Renamed"), Response(), owner_id=owner_id, db=db)
+
+    assert commands == ["findAndModify"]
+    assert updated.title == "Renamed"
+    assert updated.content == "World"
+    stored = await db["notes"].find_one({"_id": note.id})
+    assert stored["title"] == "Renamed"
+    assert stored["updated_at"] == updated.updated_at
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo.errors import ExecutionTimeout
+
+from app.pagination import decode_cursor
+from app.routes import notes as notes_routes
+from app.routes.notes import _search_pipeline
+
+
+def _hit(score):
+    return {"_id": ObjectId(), "title": "t", "snippet": "s", "score": score,
+            "updated_at": datetime(2024, 1, 1)}
+
+
+def test_pipeline_is_scoped_to_owner_and_pages_by_score():
+    owner_id = ObjectId()
+    last_id = ObjectId()
+    pipeline = _search_pipeline(owner_id, '-draft "road trip" Packing', (1.5, last_id), 10)
+
+    first = pipeline[0]["$match"]
+    assert first["$text"] == {"$search": '-draft "road trip" Packing'}
+    assert first["owner_id"] == owner_id
+    assert first["deleted"] == {"$ne": True}
+    assert pipeline[2]["$match"]["$or"][1] == {"score": 1.5, "_id": {"$lt": last_id}}
+    assert pipeline[3] == {"$sort": {"score": -1, "_id": -1}}
+    projection = pipeline[-1]["$project"]
+    assert "content" not in projection
+    assert projection["snippet"]["$let"]["vars"]["at"]["$indexOfCP"][1] == "road"
+
+
+def test_search_returns_hits_and_next_cursor(client, db):
+    hits = [_hit(2.0), _hit(1.25)]
+    db["notes"].aggregate_results = hits
+
+    response = client.get("/api/notes/search", params={"q": "trip", "limit": 2})
+
+    assert response.status_code == 200
+    assert [hit["id"] for hit in response.json()] == [str(hit["_id"]) for hit in hits]
+    assert response.json()[1]["score"] == 1.25
+    assert decode_cursor(response.headers["X-Next-Cursor"]) == [1.25, hits[1]["_id"]]
+    assert db.commands == ["aggregate"]
+    # The server aborts slow searches
+    assert db["notes"].pipelines[0][1] == {"maxTimeMS": notes_routes.settings.NOTES_SEARCH_MAX_TIME_MS}
+
+    # A short page is the last one
+    db["notes"].aggregate_results = hits[:1]
+    assert "X-Next-Cursor" not in client.get("/api/notes/search", params={"q": "trip", "limit": 2}).headers
+
+
+def test_search_timeout_and_bad_cursor(client, db):
+    db["notes"].fail_next["aggregate"] = ExecutionTimeout("operation exceeded time limit")
+    assert client.get("/api/notes/search", params={"q": "trip"}).status_code == 503
+    assert client.get("/api/notes/search", params={"q": "trip", "cursor": "nope"}).status_code == 400
+    assert client.get("/api/notes/search", params={"q": ""}).status_code == 422
@@ -0,0 +1,222 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from app import changefeed
+from app.changefeed import NoteChangeHub
+from app.routes import notes as notes_routes
+from app.routes.notes import _note_events
+
+
+def _write(db, owner_id, at, deleted=False):
+    doc = {"_id": ObjectId(), "owner_id": owner_id, "created_at": at, "updated_at": at}
+    if deleted:
+        doc.update(deleted=True, deleted_at=at)
+    else:
+        doc.update(title="t", content="c")
+    db["notes"].docs.append(doc)
+    return doc["_id"]
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = NoteChangeHub(max_queue=2)
+    monkeypatch.setattr(notes_routes, "note_changes", hub)
+    monkeypatch.setattr(notes_routes, "_utcnow", lambda: datetime(2024, 6, 1, 12, 0, 0))
+    return hub
+
+
+def _events(chunks):
+    return [chunk.decode() for chunk in chunks]
+
+
+def test_hub_routes_by_owner_and_flags_overflow():
+    hub = NoteChangeHub(max_queue=1)
+    owner, other = ObjectId(), ObjectId()
+    mine, theirs = hub.subscribe(owner), hub.subscribe(other)
+
+    hub.publish({"owner_id": owner, "n": 1})
+    assert mine.queue.get_nowait() == {"owner_id": owner, "n": 1}
+    assert theirs.queue.empty()
+
+    hub.publish({"owner_id": owner, "n": 2})
+    hub.publish({"owner_id": owner, "n": 3})
+    assert mine.overflowed.is_set()
+    assert not theirs.overflowed.is_set()
+
+    hub.unsubscribe(mine)
+    hub.unsubscribe(theirs)
+    assert hub.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_then_forwards_live_changes(hub, db, owner_id):
+    at = datetime(2024, 6, 1, 11, 0, 0)
+    _write(db, owner_id, at)
+    deleted_id = _write(db, owner_id, at + timedelta(minutes=1), deleted=True)
+    _write(db, ObjectId(), at)  # someone else's note is not replayed
+
+    events = _note_events(db, owner_id, since=None)
+    head = _events([await events.__anext__() for _ in range(4)])
+    assert head[0].startswith("retry:")
+    assert head[1].startswith("event: note\ndata:")
+    assert head[2].startswith("event: delete\nid: ")
+    assert str(deleted_id) in head[2]
+    assert head[3].startswith("event: ready\nid: ")
+    assert hub.subscriber_count() == 1
+
+    live = {"_id": ObjectId(), "owner_id": owner_id, "title": "new", "content": "",
+            "created_at": at, "updated_at": datetime(2024, 6, 1, 12, 0, 1)}
+    hub.publish(live)
+    event = (await events.__anext__()).decode()
+    assert event.startswith("event: note\nid: ")
+    assert '"title": "new"' in event
+
+    await events.aclose()
+    assert hub.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_when_subscriber_falls_behind(hub, db, owner_id):
+    events = _note_events(db, owner_id, since=None)
+    assert _events([await events.__anext__() for _ in range(2)])[1].startswith("event: ready")
+
+    for _ in range(3):
+        hub.publish({"owner_id": owner_id, "updated_at": datetime(2024, 6, 1, 12, 0, 1)})
+    with pytest.raises(StopAsyncIteration):
+        await asyncio.wait_for(events.__anext__(), 1)
+    assert hub.subscriber_count() == 0
+
+
+@pytest.fixture
+def feed_db(db, monkeypatch):
+    monkeypatch.setattr(changefeed, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(changefeed, "_RETRY_DELAYS", (0,))
+    return db
+
+
+async def _until(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def _drain(subscription):
+    docs = []
+    while not subscription.queue.empty():
+        docs.append(subscription.queue.get_nowait())
+    return docs
+
+
+@pytest.mark.asyncio
+async def test_poll_publishes_late_commits_in_the_lookback_once(feed_db, owner_id, monkeypatch):
+    notes = feed_db["notes"]
+    queries = []
+    find = notes.find
+
+    def recording_find(query=None, projection=None):
+        queries.append(query)
+        return find(query, projection)
+
+    monkeypatch.setattr(notes, "find", recording_find)
+    hub = NoteChangeHub(mode="poll", poll_interval=0.01)
+    mine = hub.subscribe(owner_id)
+    now = datetime.utcnow()
+    first = _write(feed_db, owner_id, now - timedelta(seconds=1))
+    _write(feed_db, ObjectId(), now)  # not subscribed
+
+    task = asyncio.create_task(hub._run())
+    try:
+        await _until(lambda: len(queries) >= 2)
+        # Committed late: its updated_at is older than the polls already run
+        late = _write(feed_db, owner_id, now - timedelta(seconds=2))
+        polled = len(queries)
+        await _until(lambda: len(queries) >= polled + 3)
+    finally:
+        task.cancel()
+
+    assert hub.source == "poll"
+    assert [doc["_id"] for doc in _drain(mine)] == [first, late]
+    assert all(query["owner_id"] == {"$in": [owner_id]} for query in queries)
+
+
+class FakeChangeStream:
+    def __init__(self, changes, error):
+        self.changes = changes
+        self.error = error
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for token, doc in self.changes:
+            self.resume_token = token
+            yield {"fullDocument": doc}
+        raise self.error
+
+
+@pytest.mark.asyncio
+async def test_watch_resumes_from_the_last_token_and_resets_on_lost_history(feed_db, owner_id, monkeypatch):
+    first, second = {"_id": ObjectId(), "owner_id": owner_id}, {"_id": ObjectId(), "owner_id": owner_id}
+    streams = [
+        FakeChangeStream([({"_data": "1"}, first)], OperationFailure("connection reset", code=91)),
+        FakeChangeStream([({"_data": "2"}, second)], OperationFailure("history lost", code=286)),
+    ]
+    resumed_after = []
+
+    def watch(pipeline, full_document=None, resume_after=None):
+        resumed_after.append(resume_after)
+        if not streams:
+            # Ends the test: the hub is stopped
+            return FakeChangeStream([], asyncio.CancelledError())
+        return streams.pop(0)
+
+    monkeypatch.setattr(feed_db["notes"], "watch", watch, raising=False)
+    hub = NoteChangeHub(mode="changestream")
+    subscription = hub.subscribe(owner_id)
+
+    with pytest.raises(asyncio.CancelledError):
+        await hub._watch()
+
+    assert hub.source == "changestream"
+    # Resumed after the transient error, started over once history was lost
+    assert resumed_after == [None, {"_data": "1"}, None]
+    # The reset closes the subscription: the client reconnects and catches up
+    assert _drain(subscription) == [first, second, {}]
+    assert subscription.overflowed.is_set()
+    assert hub.resume_token is None
+
+
+@pytest.mark.asyncio
+async def test_run_falls_back_to_polling_without_change_streams(feed_db, monkeypatch):
+    calls = []
+
+    async def watch():
+        calls.append("watch")
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+    async def poll():
+        calls.append("poll")
+
+    hub = NoteChangeHub(mode="auto")
+    monkeypatch.setattr(hub, "_watch", watch)
+    monkeypatch.setattr(hub, "_poll", poll)
+    await hub._run()
+    assert calls == ["watch", "poll"]
+
+    # Asked for change streams explicitly: the error is not swallowed
+    hub.mode = "changestream"
+    with pytest.raises(OperationFailure):
+        await hub._run()
+    assert calls == ["watch", "poll", "watch"]
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.titles import (
+    BACKFILL_MIGRATION_ID,
+    backfill_title_norm,
+    backfill_title_norm_once,
+    normalize_prefix,
+    normalize_title,
+    with_title_norm,
+)
+
+
+def test_normalize_title_folds_case_accents_and_spaces():
+    assert normalize_title("  Đi   chợ  Thứ Bảy ") == "di cho thu bay"
+    assert normalize_title("Straße Café") == "strasse cafe"
+    assert normalize_title("ﬁle №1") == "file no1"
+
+
+def test_normalize_prefix_keeps_a_trailing_space():
+    assert normalize_prefix("ĐI  C") == "di c"
+    assert normalize_prefix("Đi  ") == "di "
+    assert normalize_prefix("   ") == ""
+
+
+def test_with_title_norm_only_when_title_is_set():
+    assert with_title_norm({"title": "Hello World"})["title_norm"] == "hello world"
+    assert "title_norm" not in with_title_norm({"content": "x", "title": None})
+
+
+def _add(db, owner_id, title, **fields):
+    doc = with_title_norm({"_id": ObjectId(), "owner_id": owner_id, "title": title, "content": "", **fields})
+    db["notes"].docs.append(doc)
+    return doc["_id"]
+
+
+def _suggest(client, prefix):
+    return [note["title"] for note in client.get("/api/notes/suggest", params={"prefix": prefix}).json()]
+
+
+def test_suggest_matches_the_owners_titles_by_normalized_prefix(client, db, owner_id):
+    cho = _add(db, owner_id, "Đi chợ")
+    _add(db, owner_id, "Diary")
+    _add(db, owner_id, "Đi làm")
+    _add(db, owner_id, "Đi chơi", deleted=True)
+    _add(db, ObjectId(), "Đi cắm trại")
+
+    response = client.get("/api/notes/suggest", params={"prefix": "ĐI  C"})
+    assert response.json() == [{"id": str(cho), "title": "Đi chợ"}]
+
+    # In title order; a trailing space ends the word
+    assert _suggest(client, "di") == ["Đi chợ", "Đi làm", "Diary"]
+    assert _suggest(client, "di ") == ["Đi chợ", "Đi làm"]
+
+    assert _suggest(client, "   ") == []
+    assert db.commands == ["find"] * 3
+
+
+def test_suggest_prefix_is_literal_and_any_code_point_works(client, db, owner_id):
+    _add(db, owner_id, "a.b (draft)")
+    _add(db, owner_id, "axb")
+
+    assert _suggest(client, "a.") == ["a.b (draft)"]
+    assert _suggest(client, "a.b (") == ["a.b (draft)"]
+    # The next code point after U+D7FF would be a lone surrogate
+    assert client.get("/api/notes/suggest", params={"prefix": "퟿"}).json() == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_sets_title_norm_on_old_notes_only(db, owner_id):
+    old = _add(db, owner_id, "Đi chợ")
+    del db["notes"]._get(old)["title_norm"]
+    current = _add(db, owner_id, "Kept")
+    db["notes"]._get(current)["title_norm"] = "set by the write path"
+
+    assert await backfill_title_norm(db) == 1
+    assert db["notes"]._get(old)["title_norm"] == "di cho"
+    assert db["notes"]._get(current)["title_norm"] == "set by the write path"
+
+
+@pytest.mark.asyncio
+async def test_backfill_runs_once_across_workers(db, owner_id):
+    note = _add(db, owner_id, "Old")
+    del db["notes"]._get(note)["title_norm"]
+
+    assert await backfill_title_norm_once(db) == 1
+    # Another worker (or a restart) finds it done and does not scan the notes
+    db.commands.clear()
+    assert await backfill_title_norm_once(db) == 0
+    assert db.commands == ["update"]
+    assert "completed_at" in db["migrations"]._get(BACKFILL_MIGRATION_ID)
+
+
+@pytest.mark.asyncio
+async def test_backfill_claim_is_taken_over_when_stale(db):
+    migrations = db["migrations"]
+    migrations.docs.append({"_id": BACKFILL_MIGRATION_ID, "claimed_at": datetime.utcnow()})
+    await backfill_title_norm_once(db)
+    assert "completed_at" not in migrations._get(BACKFILL_MIGRATION_ID)
+
+    migrations._get(BACKFILL_MIGRATION_ID)["claimed_at"] -= timedelta(hours=1)
+    await backfill_title_norm_once(db)
+    assert "completed_at" in migrations._get(BACKFILL_MIGRATION_ID)
@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips_sort_keys():
+    updated_at = datetime(2024, 5, 1, 12, 30, 15, 123000)
+    note_id = ObjectId()
+
+    token = encode_cursor(updated_at, note_id)
+
+    assert "=" not in token
+    assert decode_cursor(token) == [updated_at, note_id]
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "e30", encode_cursor("x")[:-2] + "$$"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def _token(parts):
+    return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode()
+
+
+@pytest.mark.parametrize("parts", [[{"d": 1}, {"o": []}], [{"o": []}], [{"d": "yesterday"}], [{"$gt": ""}], [[1]]])
+def test_wrong_typed_parts_are_rejected(parts):
+    with pytest.raises(ValueError):
+        decode_cursor(_token(parts))
+
+
+def test_note_list_answers_400_for_a_wrong_typed_cursor(client):
+    response = client.get("/api/notes/", params={"cursor": _token([{"d": 1}, {"o": []}])})
+    assert response.status_code == 400
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.security.hashing import PasswordHashExecutor
+
+
+@pytest.mark.asyncio
+async def test_runs_work_off_the_event_loop():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=0)
+    loop_thread = threading.get_ident()
+
+    worker_thread = await executor.run(threading.get_ident)
+
+    assert worker_thread != loop_thread
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_with_503_when_backlog_is_full():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1, retry_after=3)
+    release = threading.Event()
+
+    running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await executor.run(release.wait)
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "3"
+    assert executor.rejected == 1
+
+    release.set()
+    await asyncio.gather(*running)
+    await asyncio.sleep(0)
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+def test_slot_is_released_when_loop_closed_before_work_finishes():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+    finished = threading.Event()
+
+    async def start_and_abandon():
+        task = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        task.cancel()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_and_abandon())
+    loop.close()
+    assert executor.pending == 1
+
+    executor._get_executor().submit(finished.set)
+    release.set()
+    assert finished.wait(5)
+    assert executor.pending == 0
+    executor.shutdown()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app import database
+from app.database import PoolMetricsListener
+
+
+def test_tracks_checkouts_wait_time_and_churn():
+    listener = PoolMetricsListener()
+    listener.connection_created(SimpleNamespace())
+    listener.connection_created(SimpleNamespace())
+    listener.connection_checked_out(SimpleNamespace(duration=0.25))
+    listener.connection_checked_out(SimpleNamespace(duration=0.05))
+    listener.connection_checked_in(SimpleNamespace())
+    listener.connection_closed(SimpleNamespace())
+
+    stats = listener.stats()
+    assert stats["open_connections"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["connections_created"] == 2
+    assert stats["connections_closed"] == 1
+    assert stats["checkout_wait_seconds_total"] == pytest.approx(0.3)
+    assert stats["checkout_wait_seconds_max"] == 0.25
+
+
+class FakeClient:
+    """Pings open at most two connections; the rest arrive in the background."""
+
+    def __init__(self, listener, background):
+        self.admin = self
+        self.listener = listener
+        self.background = background
+        self.tasks = []
+
+    async def command(self, name):
+        if self.listener.connections_created < 2:
+            self.listener.connection_created(SimpleNamespace())
+        if not self.tasks:
+            self.tasks.append(asyncio.create_task(self._maintain()))
+
+    async def _maintain(self):
+        for _ in range(self.background):
+            await asyncio.sleep(0.01)
+            self.listener.connection_created(SimpleNamespace())
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    listener = PoolMetricsListener()
+    monkeypatch.setattr(database, "pool_metrics", listener)
+    monkeypatch.setattr(database.settings, "MONGODB_MIN_POOL_SIZE", 5)
+    monkeypatch.setattr(database.settings, "MONGODB_POOL_WARMUP_TIMEOUT_SECONDS", 0.5)
+
+    def client(background):
+        monkeypatch.setattr(database.db, "client", FakeClient(listener, background))
+        return listener
+
+    return client
+
+
+@pytest.mark.asyncio
+async def test_warm_up_waits_for_min_pool_size(pool):
+    listener = pool(background=3)
+
+    await database.warm_up_pool()
+
+    assert listener.open_connections == 5
+
+
+@pytest.mark.asyncio
+async def test_warm_up_logs_the_shortfall_on_timeout(pool, caplog):
+    listener = pool(background=1)
+
+    with caplog.at_level(logging.WARNING, logger="app.database"):
+        await database.warm_up_pool()
+
+    assert listener.open_connections == 3
+    assert "3 of 5 connections open (2 short)" in caplog.text
@@ -0,0 +1,150 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.ratelimit.memory import InMemoryRateLimiter
+
+
+def test_allows_up_to_limit_then_rejects():
+    limiter = InMemoryRateLimiter(limit=3, period=60)
+
+    assert [limiter.check("a", 0.0) for _ in range(4)] == [True, True, True, False]
+    # Other clients are unaffected
+    assert limiter.check("b", 0.0)
+
+
+def test_previous_window_is_weighted_by_remaining_time():
+    limiter = InMemoryRateLimiter(limit=10, period=60)
+    for _ in range(10):
+        assert limiter.check("a", 59.0)
+
+    # Just after the boundary almost the whole previous window still counts
+    assert limiter.check("a", 61.0)
+    assert not limiter.check("a", 61.0)
+    # Halfway through, half of it (5) counts, leaving room for 4 more
+    assert [limiter.check("a", 90.0) for _ in range(5)] == [True] * 4 + [False]
+
+
+def test_evicts_least_recently_used_key_at_capacity():
+    limiter = InMemoryRateLimiter(limit=1, period=60, max_keys=2)
+    limiter.check("a", 0.0)
+    limiter.check("b", 0.0)
+    limiter.check("a", 0.0)  # "a" is now most recently used
+
+    limiter.check("c", 0.0)
+
+    assert len(limiter) == 2
+    assert limiter.evictions == 1
+    # "b" was evicted, so it starts over with a fresh budget
+    assert limiter.check("b", 0.0)
+
+
+def test_idle_keys_expire_without_full_scan():
+    limiter = InMemoryRateLimiter(limit=5, period=60)
+    limiter.check("idle-1", 0.0)
+    limiter.check("idle-2", 0.0)
+
+    limiter.check("active", 200.0)
+
+    assert len(limiter) == 1
+
+
+def test_shared_memory_limit_is_enforced_across_instances(tmp_path):
+    from app.ratelimit.shared import SharedMemoryRateLimiter
+
+    path = str(tmp_path / "ratelimit")
+    worker_a = SharedMemoryRateLimiter(limit=4, path=path, slots=64)
+    worker_b = SharedMemoryRateLimiter(limit=4, path=path, slots=64)
+
+    results = [
+        worker.check("10.0.0.1", 0.0)
+        for worker in (worker_a, worker_b, worker_a, worker_b, worker_a)
+    ]
+
+    assert results == [True, True, True, True, False]
+    assert worker_b.check("10.0.0.2", 0.0)
+
+
+def test_shared_memory_bucket_collisions_stay_conservative(tmp_path):
+    from app.ratelimit.shared import SharedMemoryRateLimiter
+
+    # A single bucket of four slots, shared by many keys
+    limiter = SharedMemoryRateLimiter(limit=2, path=str(tmp_path / "rl"), slots=4)
+    for i in range(20):
+        limiter.check(f"client-{i}", 0.0)
+        limiter.check(f"client-{i}", 0.0)
+
+    assert not limiter.check("client-19", 0.0)
+
+
+@pytest.fixture
+def mongo_limiters(db, monkeypatch):
+    from app.ratelimit import mongo
+
+    now = [120.0]
+    monkeypatch.setattr(mongo, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(mongo.time, "time", lambda: now[0])
+    return mongo.MongoRateLimiter, now
+
+
+async def _hits(limiter, key, count):
+    return [await limiter.hit(key) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_mongo_limit_is_enforced_across_instances_after_sync(db, mongo_limiters):
+    MongoRateLimiter, now = mongo_limiters
+    worker_a = MongoRateLimiter(limit=4, period=60)
+    worker_b = MongoRateLimiter(limit=4, period=60)
+
+    assert await _hits(worker_a, "10.0.0.1", 3) == [True] * 3
+    await worker_a.sync()
+    # Nothing is sent to MongoDB per request, only on sync
+    assert db.commands == ["bulkWrite", "find"]
+
+    assert await _hits(worker_b, "10.0.0.1", 1) == [True]
+    await worker_b.sync()
+    assert await _hits(worker_b, "10.0.0.1", 1) == [False]
+    assert await _hits(worker_b, "10.0.0.2", 1) == [True]
+    assert db["rate_limits"]._get("10.0.0.1:2")["count"] == 4
+
+
+@pytest.mark.asyncio
+async def test_mongo_failed_sync_keeps_counts_for_the_next_one(db, mongo_limiters):
+    MongoRateLimiter, now = mongo_limiters
+    limiter = MongoRateLimiter(limit=10, period=60)
+    await _hits(limiter, "a", 2)
+    db["rate_limits"].fail_next["bulk_write"] = ConnectionError("network down")
+
+    with pytest.raises(ConnectionError):
+        await limiter.sync()
+    assert db["rate_limits"].docs == []
+
+    await _hits(limiter, "a", 1)
+    await limiter.sync()
+    assert db["rate_limits"]._get("a:2")["count"] == 3
+    # Flushed once: a further sync adds nothing
+    await limiter.sync()
+    assert db["rate_limits"]._get("a:2")["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_mongo_previous_window_counts_and_documents_expire(db, mongo_limiters):
+    MongoRateLimiter, now = mongo_limiters
+    limiter = MongoRateLimiter(limit=4, period=60)
+    await limiter.start()
+    try:
+        await _hits(limiter, "a", 4)
+        await limiter.sync()
+    finally:
+        await limiter.close()
+
+    assert db["rate_limits"].indexes == [{"key": {"expires_at": 1}, "name": "expires_at_1", "expireAfterSeconds": 0}]
+    # Kept through the next window, where it still weighs on the limit
+    assert db["rate_limits"]._get("a:2")["expires_at"] == datetime(1970, 1, 1, 0, 4, tzinfo=timezone.utc)
+
+    now[0] = 195.0  # a quarter into the next window: 4 * 0.75 = 3 still count
+    other = MongoRateLimiter(limit=4, period=60)
+    assert await _hits(other, "a", 1) == [True]
+    await other.sync()
+    assert await _hits(other, "a", 1) == [False]
@@ -0,0 +1,99 @@
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.middleware.security import (
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+    build_security_headers,
+)
+from app.middleware.timing import ProcessTimeMiddleware
+from app.ratelimit.memory import InMemoryRateLimiter
+
+
+def _build_app(limit: int = 100, config=settings) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/page", response_class=HTMLResponse)
+    async def page():
+        return "<p>hello</p>"
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/framed")
+    async def framed():
+        return JSONResponse({"ok": True}, headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk {i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(SecurityHeadersMiddleware, config=config)
+    app.add_middleware(RateLimitMiddleware, limiter=InMemoryRateLimiter(limit=limit, period=60))
+    app.add_middleware(ProcessTimeMiddleware)
+    return app
+
+
+def test_headers_added_to_regular_and_streaming_responses():
+    client = TestClient(_build_app())
+
+    for path in ("/ping", "/stream"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert response.headers["Referrer-Policy"] == "strict-origin-when-cross-origin"
+        assert float(response.headers["X-Process-Time"]) >= 0
+
+    assert client.get("/stream").text == "chunk 0\nchunk 1\nchunk 2\n"
+
+
+def test_rate_limit_rejects_with_429():
+    client = TestClient(_build_app(limit=2))
+
+    assert [client.get("/ping").status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get("/ping").text == "Rate limit exceeded"
+
+
+def test_profiles_by_route_and_content_type():
+    client = TestClient(_build_app())
+
+    health = client.get("/api/health").headers
+    assert health["X-Content-Type-Options"] == "nosniff"
+    assert "X-Frame-Options" not in health
+
+    api = client.get("/ping").headers
+    assert api["X-Frame-Options"] == "DENY"
+    assert "Cross-Origin-Opener-Policy" not in api
+
+    html = client.get("/page").headers
+    assert html["X-Frame-Options"] == "DENY"
+    assert html["Cross-Origin-Opener-Policy"] == "same-origin"
+
+
+def test_headers_set_by_the_route_are_not_repeated():
+    response = TestClient(_build_app()).get("/framed")
+
+    assert response.headers.get_list("X-Frame-Options") == ["SAMEORIGIN"]
+    assert response.headers.get_list("Referrer-Policy") == ["strict-origin-when-cross-origin"]
+
+
+def test_production_headers_are_built_from_settings():
+    production = settings.model_copy(update={"ENVIRONMENT": "production", "HSTS_SECONDS": 600})
+    profiles = build_security_headers(production)
+
+    assert (b"strict-transport-security", b"max-age=600; includeSubDomains") in profiles["minimal"]
+    assert any(key == b"content-security-policy" for key, _ in profiles["default"])
+    assert not any(key == b"content-security-policy" for key, _ in build_security_headers(settings)["default"])
+
+    headers = TestClient(_build_app(config=production)).get("/ping").headers
+    assert headers["Strict-Transport-Security"] == "max-age=600; includeSubDomains"
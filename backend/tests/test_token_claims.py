@@ -0,0 +1,62 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.security import create_access_token, get_current_user, get_current_user_id
+from app.security.cache import token_version_cache, user_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    token_version_cache.clear()
+    user_cache.clear()
+    yield
+    token_version_cache.clear()
+    user_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_user_id_comes_from_token_with_cached_version_check(db):
+    user_id = ObjectId()
+    db["users"].docs.append({"_id": user_id, "token_version": 2})
+    token = create_access_token({"sub": "a@example.com", "uid": str(user_id), "ver": 2})
+
+    assert await get_current_user_id(token, db) == user_id
+    assert await get_current_user_id(token, db) == user_id
+    assert db.commands == ["find"]
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_version_is_rejected(db):
+    user_id = ObjectId()
+    db["users"].docs.append({"_id": user_id, "token_version": 3})
+    token = create_access_token({"sub": "a@example.com", "uid": str(user_id), "ver": 2})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user_id(token, db)
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_deleted_user_is_rejected(db):
+    user_id = ObjectId()
+    token = create_access_token({"sub": "a@example.com", "uid": str(user_id), "ver": 0})
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user_id(token, db)
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_user_must_match_the_id_in_the_token(db):
+    user_id = ObjectId()
+    db["users"].docs.append({"_id": user_id, "email": "a@example.com", "hashed_password": "x"})
+
+    user = await get_current_user(create_access_token({"sub": "a@example.com", "uid": str(user_id)}), db)
+    assert user.id == user_id
+
+    # Same email, but the token was issued to another account
+    token = create_access_token({"sub": "a@example.com", "uid": str(ObjectId())})
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(token, db)
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from app.security.cache import TTLCache
+
+
+def test_counts_hits_and_misses():
+    cache = TTLCache(max_size=10, ttl=60)
+    assert cache.get("a@example.com") is None
+    cache.set("a@example.com", "user-a")
+
+    assert cache.get("a@example.com") == "user-a"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_size=10, ttl=60)
+    with mock.patch("app.security.cache.time.monotonic", return_value=1000.0):
+        cache.set("a@example.com", "user-a")
+    with mock.patch("app.security.cache.time.monotonic", return_value=1061.0):
+        assert cache.get("a@example.com") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_and_disabled_cache():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+    disabled = TTLCache(max_size=0, ttl=60)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None